@@ -1,26 +1,7 @@
-import re
 from collections import defaultdict
+from netlist import compile_circuit, parse_bench_file
+from fault_sim import collapse_faults
 
-def parse_bench_file(file_path):
-    inputs, outputs, gates = [], [], {}
-    node_pattern = re.compile(r'\((.*?)\)')
-    gate_pattern = re.compile(r'(.*?)\s*=\s*(.*?)\((.*?)\)')
-
-    with open(file_path, 'r') as file:
-        for line in file:
-            line = line.strip()
-            if line.startswith('INPUT'):
-                inputs.append(node_pattern.search(line).group(1))
-            elif line.startswith('OUTPUT'):
-                outputs.append(node_pattern.search(line).group(1))
-            elif '=' in line:
-                match = gate_pattern.match(line)
-                if match:
-                    output, gate_type, inputs_str = match.groups()
-                    gate_inputs = [inp.strip() for inp in inputs_str.split(',')]
-                    gates[output] = {'type': gate_type, 'inputs': gate_inputs}
-
-    return inputs, outputs, gates
 
 def generate_fault_list(inputs, outputs, gates):
     fault_list = defaultdict(list)
@@ -68,11 +49,27 @@ def print_fault_list(fault_list, inputs, outputs, gates):
     for gate_type, count in gate_types.items():
         print(f"    {gate_type}: {count}")
 
+def collapse_fault_list(fault_list, inputs, outputs, gates, dominance=True):
+    # Flatten the per-node lists (outputs appear twice) and collapse structurally
+    all_faults = list(dict.fromkeys(f for faults in fault_list.values() for f in faults))
+    collapsed, fault_map = collapse_faults(compile_circuit(inputs, outputs, gates), all_faults, dominance)
+    return all_faults, collapsed, fault_map
+
+def print_collapsed_fault_list(fault_list, inputs, outputs, gates):
+    all_faults, equivalent, _ = collapse_fault_list(fault_list, inputs, outputs, gates, dominance=False)
+    _, collapsed, _ = collapse_fault_list(fault_list, inputs, outputs, gates)
+
+    print("\nFault Collapsing:")
+    print(f"  Total faults: {len(all_faults)}")
+    print(f"  After equivalence collapsing: {len(equivalent)} ({len(equivalent) / len(all_faults):.2f} of total)")
+    print(f"  After dominance collapsing: {len(collapsed)} ({len(collapsed) / len(all_faults):.2f} of total)")
+
 def main():
     file_path = "c432.bench"  
     inputs, outputs, gates = parse_bench_file(file_path)
     fault_list = generate_fault_list(inputs, outputs, gates)
     print_fault_list(fault_list, inputs, outputs, gates)
+    print_collapsed_fault_list(fault_list, inputs, outputs, gates)
 
 if __name__ == "__main__":
     main()
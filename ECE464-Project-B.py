@@ -1,36 +1,5 @@
-import re
+from netlist import compile_circuit, parse_bench_file
 
-def parse_bench_file(file_path):
-    """
-    Parse the .bench file to extract circuit inputs, outputs, and gate configurations.
-
-    Arguments:
-    file_path -- Path to the .bench file
-
-    Returns:
-    inputs -- List of input nodes
-    outputs -- List of output nodes
-    gates -- Dictionary mapping gate outputs to their types and input nodes
-    """
-    inputs, outputs, gates = [], [], {}
-    node_pattern = re.compile(r'\((.*?)\)')  # Regex to extract node names within parentheses
-    gate_pattern = re.compile(r'(.*?)\s*=\s*(.*?)\((.*?)\)')  # Regex to capture gate expressions
-
-    with open(file_path, 'r') as file:
-        for line in file:
-            line = line.strip()
-            if line.startswith('INPUT'):  # Identify and store input nodes
-                inputs.append(node_pattern.search(line).group(1))
-            elif line.startswith('OUTPUT'):  # Identify and store output nodes
-                outputs.append(node_pattern.search(line).group(1))
-            elif '=' in line:  # Parse gate expressions
-                match = gate_pattern.match(line)
-                if match:
-                    output, gate_type, inputs_str = match.groups()
-                    gate_inputs = [inp.strip() for inp in inputs_str.split(',')]  # Split gate inputs
-                    gates[output.strip()] = {'type': gate_type, 'inputs': gate_inputs}
-
-    return inputs, outputs, gates
 
 def simulate_circuit(inputs, outputs, gates, input_vector):
     """
@@ -77,14 +46,11 @@ def simulate_circuit(inputs, outputs, gates, input_vector):
             # Default to buffer behavior for unknown gate types
             return input_values[0]
 
-    # Topological evaluation of the circuit (sequentially evaluate gates after inputs)
-    evaluated = set(inputs)
-    while len(evaluated) < len(inputs) + len(gates):  # Continue until all gates are evaluated
-        for gate, info in gates.items():
-            if gate not in evaluated and all(inp in evaluated for inp in info['inputs']):
-                input_values = [node_values[inp] for inp in info['inputs']]  # Gather input values for the gate
-                node_values[gate] = evaluate_gate(info['type'], input_values)  # Evaluate gate
-                evaluated.add(gate)  # Mark gate as evaluated
+    # Topological evaluation of the circuit: one sweep over the levelized schedule,
+    # which is computed once per parsed circuit and reused across input vectors
+    for gate, gate_type, gate_inputs in compile_circuit(inputs, outputs, gates).schedule:
+        input_values = [node_values[inp] for inp in gate_inputs]  # Gather input values for the gate
+        node_values[gate] = evaluate_gate(gate_type, input_values)  # Evaluate gate
 
     return {output: node_values[output] for output in outputs}  # Return the final output values
 
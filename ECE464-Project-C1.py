@@ -1,27 +1,4 @@
-import re
-
-# Parse the .bench file to extract inputs, outputs, and gate connections
-def parse_bench_file(file_path):
-    inputs, outputs, gates = [], [], {}
-    node_pattern = re.compile(r'\((.*?)\)')
-    gate_pattern = re.compile(r'(.*?)\s*=\s*(.*?)\((.*?)\)')
-
-    # Read and process each line of the file
-    with open(file_path, 'r') as file:
-        for line in file:
-            line = line.strip()
-            if line.startswith('INPUT'):
-                inputs.append(node_pattern.search(line).group(1))  # Extract inputs
-            elif line.startswith('OUTPUT'):
-                outputs.append(node_pattern.search(line).group(1))  # Extract outputs
-            elif '=' in line:
-                match = gate_pattern.match(line)
-                if match:
-                    output, gate_type, inputs_str = match.groups()
-                    gate_inputs = [inp.strip() for inp in inputs_str.split(',')]
-                    gates[output.strip()] = {'type': gate_type, 'inputs': gate_inputs}  # Define gates
-
-    return inputs, outputs, gates
+from netlist import compile_circuit, parse_bench_file
 
 # Evaluate logic gate based on its type and input values
 def evaluate_gate(gate_type, input_values):
@@ -44,27 +21,22 @@ def evaluate_gate(gate_type, input_values):
 # Simulate the circuit for given inputs and fault scenario (if any)
 def simulate_circuit(inputs, outputs, gates, input_vector, fault=None):
     node_values = {node: input_vector[i] for i, node in enumerate(inputs)}  # Assign input values to nodes
-    evaluated = set(inputs)
 
-    # Evaluate gates one by one based on dependencies
-    while len(evaluated) < len(inputs) + len(gates):
-        for gate, info in gates.items():
-            if gate not in evaluated and all(inp in evaluated for inp in info['inputs']):
-                input_values = [node_values[inp] for inp in info['inputs']]
+    # Evaluate gates in levelized order so every fanin is ready before it is read
+    for gate, gate_type, gate_inputs in compile_circuit(inputs, outputs, gates).schedule:
+        input_values = [node_values[inp] for inp in gate_inputs]
 
-                # Apply stuck-at fault if present
-                if fault and fault['type'] == 'sa' and gate == fault['node']:
-                    node_values[gate] = fault['value']
-                elif fault and fault['type'] == 'input_sa' and gate == fault['gate']:
-                    input_index = info['inputs'].index(fault['input'])
-                    input_values[input_index] = fault['value']
-                    node_values[gate] = evaluate_gate(info['type'], input_values)
-                else:
-                    node_values[gate] = evaluate_gate(info['type'], input_values)
+        # Apply stuck-at fault if present
+        if fault and fault['type'] == 'sa' and gate == fault['node']:
+            node_values[gate] = fault['value']
+        elif fault and fault['type'] == 'input_sa' and gate == fault['gate']:
+            input_index = gate_inputs.index(fault['input'])
+            input_values[input_index] = fault['value']
+            node_values[gate] = evaluate_gate(gate_type, input_values)
+        else:
+            node_values[gate] = evaluate_gate(gate_type, input_values)
 
-                evaluated.add(gate)  # Mark gate as evaluated
-
-                print(f"Evaluating gate {gate} ({info['type']}): inputs = {input_values}, output = {node_values[gate]}")
+        print(f"Evaluating gate {gate} ({gate_type}): inputs = {input_values}, output = {node_values[gate]}")
 
     return {output: node_values[output] for output in outputs}  # Return final output values
 
@@ -122,28 +94,7 @@ def main():
 if __name__ == "__main__":
     main()
 
-import re
-
-def parse_bench_file(file_path):
-    inputs, outputs, gates = [], [], {}
-    node_pattern = re.compile(r'\((.*?)\)')
-    gate_pattern = re.compile(r'(.*?)\s*=\s*(.*?)\((.*?)\)')
-
-    with open(file_path, 'r') as file:
-        for line in file:
-            line = line.strip()
-            if line.startswith('INPUT'):
-                inputs.append(node_pattern.search(line).group(1))
-            elif line.startswith('OUTPUT'):
-                outputs.append(node_pattern.search(line).group(1))
-            elif '=' in line:
-                match = gate_pattern.match(line)
-                if match:
-                    output, gate_type, inputs_str = match.groups()
-                    gate_inputs = [inp.strip() for inp in inputs_str.split(',')]
-                    gates[output.strip()] = {'type': gate_type, 'inputs': gate_inputs}
-
-    return inputs, outputs, gates
+
 
 def evaluate_gate(gate_type, input_values):
     if gate_type == 'AND':
@@ -169,20 +120,15 @@ def simulate_circuit(inputs, outputs, gates, input_vector, fault=None):
     if fault and fault['type'] == 'sa' and fault['node'] in inputs:
         node_values[fault['node']] = fault['value']
 
-    evaluated = set(inputs)
-    while len(evaluated) < len(inputs) + len(gates):
-        for gate, info in gates.items():
-            if gate not in evaluated and all(inp in evaluated for inp in info['inputs']):
-                input_values = [node_values[inp] for inp in info['inputs']]
-
-                if fault and fault['type'] == 'sa' and gate == fault['node']:
-                    node_values[gate] = fault['value']
-                else:
-                    node_values[gate] = evaluate_gate(info['type'], input_values)
+    for gate, gate_type, gate_inputs in compile_circuit(inputs, outputs, gates).schedule:
+        input_values = [node_values[inp] for inp in gate_inputs]
 
-                evaluated.add(gate)
+        if fault and fault['type'] == 'sa' and gate == fault['node']:
+            node_values[gate] = fault['value']
+        else:
+            node_values[gate] = evaluate_gate(gate_type, input_values)
 
-                print(f"Evaluating gate {gate} ({info['type']}): inputs = {input_values}, output = {node_values[gate]}")
+        print(f"Evaluating gate {gate} ({gate_type}): inputs = {input_values}, output = {node_values[gate]}")
 
     return {output: node_values[output] for output in outputs}
 
@@ -1,33 +1,22 @@
-import re
-import random
+import sys
 import time
+import simstats
+from netlist import CACHE_DIR, load_circuit, evaluate_gate
+from patterns import PatternStream
+from fault_sim import (ConcurrentFaultSimulator, ShardedFaultSimulator, collapse_faults, compact_test_set,
+                       concurrent_fault_simulation, deductive_fault_simulation, expand_detected, propagate_fault,
+                       ppsfp_fault_simulation, sharded_fault_simulation)
 
 class Circuit:
-    def __init__(self, file_path):
-        self.inputs, self.outputs, self.gates = self.parse_bench_file(file_path)
+    def __init__(self, file_path, cache_dir=CACHE_DIR):
+        # Straight-line generated sweep for the good-machine passes
+        self.compiled = load_circuit(file_path, cache_dir, codegen=True)
+        self.inputs, self.outputs, self.gates = self.compiled.inputs, self.compiled.outputs, self.compiled.gates
         self.nodes = set(self.inputs + self.outputs + list(self.gates.keys()))
         self.fault_list = self.generate_full_fault_list()
-
-    def parse_bench_file(self, file_path):
-        inputs, outputs, gates = [], [], {}
-        node_pattern = re.compile(r'\((.*?)\)')
-        gate_pattern = re.compile(r'(.*?)\s*=\s*(.*?)\((.*?)\)')
-
-        with open(file_path, 'r') as file:
-            for line in file:
-                line = line.strip()
-                if line.startswith('INPUT'):
-                    inputs.append(node_pattern.search(line).group(1))
-                elif line.startswith('OUTPUT'):
-                    outputs.append(node_pattern.search(line).group(1))
-                elif '=' in line:
-                    match = gate_pattern.match(line)
-                    if match:
-                        output, gate_type, inputs_str = match.groups()
-                        gate_inputs = [inp.strip() for inp in inputs_str.split(',')]
-                        gates[output.strip()] = {'type': gate_type, 'inputs': gate_inputs}
-
-        return inputs, outputs, gates
+        # Equivalence-collapsed list and the map back to fault_list (dominance
+        # collapsing is left off so full-list coverage stays exact)
+        self.collapsed_faults, self.fault_map = collapse_faults(self.compiled, self.fault_list, dominance=False)
 
     def generate_full_fault_list(self):
         fault_list = []
@@ -36,87 +25,186 @@ class Circuit:
             fault_list.append(f"{node}-sa-1")
         return fault_list
 
-    @staticmethod
-    def evaluate_gate(gate_type, input_values):
-        if gate_type == 'AND':
-            return int(all(input_values))
-        elif gate_type == 'NAND':
-            return int(not all(input_values))
-        elif gate_type == 'OR':
-            return int(any(input_values))
-        elif gate_type == 'NOR':
-            return int(not any(input_values))
-        elif gate_type == 'XOR':
-            return int(sum(input_values) % 2 == 1)
-        elif gate_type == 'NOT':
-            return int(not input_values[0])
-        elif gate_type == 'BUFFER':
-            return input_values[0]
-        return input_values[0]
-
-    def simulate(self, input_vector, fault=None):
-        node_values = dict(zip(self.inputs, input_vector))
+    evaluate_gate = staticmethod(evaluate_gate)
 
+    # good_values (all node values of the fault-free run for the same vector)
+    # lets a faulty run re-evaluate only the fault's fanout cone
+    def simulate(self, input_vector, fault=None, good_values=None):
         if fault:
             fault_node, fault_value = fault.split('-sa-')
-            if fault_node in self.inputs:
-                node_values[fault_node] = int(fault_value)
-
-        evaluated = set(self.inputs)
-        while len(evaluated) < len(self.nodes):
-            for gate, info in self.gates.items():
-                if gate not in evaluated and all(inp in evaluated for inp in info['inputs']):
-                    input_values = [node_values[inp] for inp in info['inputs']]
-
-                    if fault and gate == fault_node:
-                        node_values[gate] = int(fault_value)
-                    else:
-                        node_values[gate] = self.evaluate_gate(info['type'], input_values)
-
-                    evaluated.add(gate)
+            fault = (fault_node, int(fault_value))
 
+        node_values = self.compiled.simulate(input_vector, fault, good_values)
         return {output: node_values[output] for output in self.outputs}
 
-def fault_simulation(circuit, test_vectors):
-    normal_results = [circuit.simulate(tv) for tv in test_vectors]
+def fault_simulation(circuit, test_vectors, backend='ppsfp', fault_list=None, workers=1):
+    if fault_list is None:
+        fault_list = circuit.fault_list
+
+    if workers != 1 and backend in ('serial', 'parallel'):
+        raise ValueError(f"The {backend} backend runs in one process; workers must be 1")
+
+    # Shard the fault list over a process pool
+    if workers != 1 and backend in ('ppsfp', 'deductive', 'concurrent'):
+        return sharded_fault_simulation(circuit.compiled, fault_list, test_vectors, workers, backend)
+
+    if backend == 'ppsfp':
+        return ppsfp_fault_simulation(circuit.compiled, fault_list, test_vectors)
+    if backend == 'deductive':
+        return deductive_fault_simulation(circuit.compiled, fault_list, test_vectors)
+    if backend == 'concurrent':
+        return concurrent_fault_simulation(circuit.compiled, fault_list, test_vectors)
+    if backend == 'serial':
+        return serial_fault_simulation(circuit, test_vectors, fault_list)
+    if backend == 'parallel':
+        return ppsfp_fault_simulation(circuit.compiled, fault_list, test_vectors, propagate=cone_detection,
+                                      engine='parallel')
+    raise ValueError(f"Unknown fault simulation backend: {backend}")
+
+# Detection word of a fault for the parallel backend: the fault's whole
+# fanout cone is re-evaluated (no event pruning), and only the outputs it
+# reaches are compared. Branch faults take the event-driven path.
+def cone_detection(compiled, good_values, mask, node, fault_value, branch_gate=None):
+    if branch_gate is not None:
+        return propagate_fault(compiled, good_values, mask, node, fault_value, branch_gate)
+    faulty_values = compiled.evaluate_cone(good_values, mask, node, mask if fault_value else 0)
+    detected = 0
+    for output in compiled.reachable_outputs(node):
+        detected |= faulty_values[output] ^ good_values[output]
+    return detected
+
+# One vector and one fault at a time; kept as a reference for the parallel backend
+def serial_fault_simulation(circuit, test_vectors, fault_list=None):
+    if fault_list is None:
+        fault_list = circuit.fault_list
+    netlist = circuit.compiled.netlist
+    normal_values = [circuit.compiled.simulate(tv) for tv in test_vectors]
     detected_faults = set()
 
-    for fault in circuit.fault_list:
+    for fault in fault_list:
+        node = netlist.ids[fault.split('-sa-')[0]]
+        reachable = [netlist.names[output] for output in circuit.compiled.reachable_outputs(node)]
         for i, tv in enumerate(test_vectors):
-            faulty_result = circuit.simulate(tv, fault)
-            if any(normal_results[i][output] != faulty_result[output] for output in circuit.outputs):
+            faulty_result = circuit.simulate(tv, fault, normal_values[i])
+            if any(normal_values[i][output] != faulty_result[output] for output in reachable):
                 detected_faults.add(fault)
                 break
 
-    return list(detected_faults), [f for f in circuit.fault_list if f not in detected_faults]
-
-def generate_random_test_vector(input_count):
-    return [random.randint(0, 1) for _ in range(input_count)]
+    return list(detected_faults), [f for f in fault_list if f not in detected_faults]
 
-def incremental_fault_simulation(circuit, initial_vector_count=10, increment=10, max_vectors=200):
+def incremental_fault_simulation(circuit, initial_vector_count=10, increment=10, max_vectors=200, backend='ppsfp',
+                                 collapsed=False, workers=1, seed=None, compact=False):
     results = []
     all_detected_faults = set()
+    # With collapsed=True only the collapsed list is simulated; coverage is
+    # still reported against the full list through circuit.fault_map
+    fault_list = circuit.collapsed_faults if collapsed else circuit.fault_list
+    undetected_faults = list(fault_list)
     test_vectors = []
 
-    for i in range(0, max_vectors, increment):
-        new_vectors = [generate_random_test_vector(len(circuit.inputs)) for _ in range(increment)]
-        test_vectors.extend(new_vectors)
-
-        detected_faults, _ = fault_simulation(circuit, test_vectors)
-        new_faults = set(detected_faults) - all_detected_faults
-        all_detected_faults.update(new_faults)
-
-        fault_coverage = len(all_detected_faults) / len(circuit.fault_list) * 100
-
-        results.append({
-            'vector_count': len(test_vectors),
-            'fault_coverage': fault_coverage,
-            'new_faults': len(new_faults)
-        })
-
+    # Increment k draws its vectors from batch k of a seeded stream, so a seed
+    # reproduces the run exactly, whatever the backend or number of workers
+    stream = PatternStream(len(circuit.inputs), seed)
+
+    # The concurrent engine keeps its state between increments, and the
+    # sharded engines keep one worker pool for the whole run
+    concurrent = ConcurrentFaultSimulator(circuit.compiled, fault_list) if backend == 'concurrent' and workers == 1 else None
+    sharded = None
+    if concurrent is None and workers != 1 and backend in ('ppsfp', 'deductive', 'concurrent'):
+        sharded = ShardedFaultSimulator(circuit.compiled, workers, backend)
+
+    try:
+        for i in range(0, max_vectors, increment):
+            new_vectors = stream.vectors(i // increment, increment)
+            test_vectors.extend(new_vectors)
+
+            # Only the new vectors are simulated, and only against faults not yet
+            # detected; detected faults are dropped for the rest of the run
+            if concurrent is not None:
+                new_faults = set()
+                for tv in new_vectors:
+                    new_faults |= concurrent.apply(tv)
+            elif sharded is not None:
+                detected_faults, undetected_faults = sharded.simulate(undetected_faults, new_vectors)
+                new_faults = set(detected_faults)
+            else:
+                detected_faults, undetected_faults = fault_simulation(circuit, new_vectors, backend, undetected_faults,
+                                                                      workers)
+                new_faults = set(detected_faults)
+            all_detected_faults.update(new_faults)
+
+            if collapsed:
+                full_detected = expand_detected(all_detected_faults, circuit.fault_map)
+                fault_coverage = len(full_detected) / len(circuit.fault_list) * 100
+            else:
+                fault_coverage = len(all_detected_faults) / len(circuit.fault_list) * 100
+
+            result = {
+                'vector_count': len(test_vectors),
+                'fault_coverage': fault_coverage,
+                'new_faults': len(new_faults)
+            }
+            if collapsed:
+                result['collapsed_coverage'] = len(all_detected_faults) / len(fault_list) * 100
+            results.append(result)
+    finally:
+        if sharded is not None:
+            sharded.close()
+
+    # With compact=True also return the compacted vector set and its coverage
+    if compact:
+        return results, compact_test_vectors(circuit, test_vectors, collapsed)
     return results
 
+# Drop the vectors that add no coverage (reverse-order fault simulation, then
+# greedy set cover over the vector x fault detection bitmap)
+def compact_test_vectors(circuit, test_vectors, collapsed=False):
+    fault_list = circuit.collapsed_faults if collapsed else circuit.fault_list
+    compacted, detected_faults = compact_test_set(circuit.compiled, fault_list, test_vectors)
+    if collapsed:
+        detected_faults = expand_detected(detected_faults, circuit.fault_map)
+
+    return {
+        'test_vectors': compacted,
+        'vector_count': len(compacted),
+        'original_count': len(test_vectors),
+        'fault_coverage': len(detected_faults) / len(circuit.fault_list) * 100
+    }
+
+# Run fault_simulation once with the simstats instrumentation on and print
+# where the time went; every batch and the summary are appended to sink as
+# JSON lines. The netlist cache is bypassed so parse and levelize are timed.
+def profile_fault_simulation(circuit_file='c1908.bench', backend='ppsfp', num_vectors=1024, sink='simstats.jsonl',
+                             seed=0):
+    stats = simstats.enable(sink)
+    try:
+        start_time = time.perf_counter()
+        circuit = Circuit(circuit_file, cache_dir=None)
+        test_vectors = PatternStream(len(circuit.inputs), seed).vectors(0, num_vectors)
+        detected_faults, _ = fault_simulation(circuit, test_vectors, backend)
+        total_time = time.perf_counter() - start_time
+    finally:
+        simstats.disable()
+
+    summary = stats.summary()
+    print(f"{circuit_file}, {backend}: {len(detected_faults)}/{len(circuit.fault_list)} faults detected by "
+          f"{num_vectors} vectors in {total_time:.2f} seconds")
+    print("Phase              | Time (s) | Share (%)")
+    print("-" * 42)
+    for name, seconds in sorted(summary['phase_times'].items(), key=lambda item: -item[1]):
+        print(f"{name:18s} | {seconds:8.3f} | {100 * seconds / total_time:9.1f}")
+    print(f"\nGate evaluations: {summary['total_gate_evals']} "
+          f"({', '.join(f'{kind} {count}' for kind, count in sorted(summary['gate_evals'].items()))})")
+    print(f"Events: {summary['events']}, batches: {summary['batches']}, faults dropped: {summary['faults_dropped']}")
+    print(f"Records appended to {sink}")
+    return summary
+
 def main():
+    # python ECE464-Project-D.py --stats [circuit] [backend] (c1908.bench and ppsfp by default)
+    if sys.argv[1:2] == ['--stats']:
+        profile_fault_simulation(*sys.argv[2:4])
+        return
+
     circuits = ['c1908.bench']
 
     for circuit_file in circuits:
@@ -124,7 +212,7 @@ def main():
         start_time = time.time()
 
         circuit = Circuit(circuit_file)
-        results = incremental_fault_simulation(circuit)
+        results, compaction = incremental_fault_simulation(circuit, compact=True)
 
         end_time = time.time()
         execution_time = end_time - start_time
@@ -134,6 +222,8 @@ def main():
         print("-" * 50)
         for r in results:
             print(f"{r['vector_count']:12d} | {r['fault_coverage']:18.2f} | {r['new_faults']:20d}")
+        print(f"\nCompacted: {compaction['original_count']} -> {compaction['vector_count']} vectors, "
+              f"fault coverage {compaction['fault_coverage']:.2f}%")
 
         print(f"\nExecution time: {execution_time:.2f} seconds")
         print("\n")
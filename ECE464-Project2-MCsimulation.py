@@ -1,5 +1,6 @@
-import random
-import re
+from netlist import compile_nodes, levelized_node_order, parse_bench_file as read_bench_file
+from patterns import PatternStream
+from testability import monte_carlo_counts, scoap_controllability
 
 # Node class to represent each component in the circuit
 class Node:
@@ -18,95 +19,48 @@ class Node:
 def parse_bench_file(file_path):
     nodes = {}
     inputs = []
-    outputs = []
     gates = []
 
-    with open(file_path, "r") as file:
-        for line in file:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-
-            # Match INPUT, OUTPUT
-            if line.startswith("INPUT("):
-                input_name = re.search(r"INPUT\((\w+)\)", line).group(1)
-                node = Node(input_name)
-                node.c0, node.c1 = 1, 1  # Inputs default to C0=1, C1=1
-                nodes[input_name] = node
-                inputs.append(node)
-
-            elif line.startswith("OUTPUT("):
-                output_name = re.search(r"OUTPUT\((\w+)\)", line).group(1)
-                outputs.append(output_name)
-
-            # Match gates
-            else:
-                gate_match = re.match(r"(\w+)\s*=\s*(\w+)\(([\w,\s]+)\)", line)
-                if gate_match:
-                    node_name, gate_type, gate_inputs = gate_match.groups()
-                    gate_inputs = gate_inputs.replace(" ", "").split(",")
-                    node = Node(node_name)
-                    node.gate_type = gate_type.upper()
-                    node.inputs = gate_inputs
-                    nodes[node_name] = node
-                    gates.append(node)
+    input_names, outputs, gate_info = read_bench_file(file_path)
+    for input_name in input_names:
+        node = Node(input_name)
+        node.c0, node.c1 = 1, 1  # Inputs default to C0=1, C1=1
+        nodes[input_name] = node
+        inputs.append(node)
+
+    for node_name, info in gate_info.items():
+        node = Node(node_name)
+        node.gate_type = info['type'].upper()
+        node.inputs = info['inputs']
+        nodes[node_name] = node
+        gates.append(node)
 
     return nodes, inputs, outputs, gates
 
-# Function to compute SCOAP metrics
+# Function to compute SCOAP metrics (levelized, so any gate order in the file works)
 def compute_scoap(nodes):
-    def get_node(name):
-        return nodes[name]
-
-    for node in nodes.values():
-        if node.gate_type is None:  # Skip inputs
-            continue
-
-        input_nodes = [get_node(inp) for inp in node.inputs]
-
-        if node.gate_type == "AND":
-            node.c0 = min(inp.c0 for inp in input_nodes) + 1
-            node.c1 = sum(inp.c1 for inp in input_nodes) + 1
-
-        elif node.gate_type == "OR":
-            node.c0 = sum(inp.c0 for inp in input_nodes) + 1
-            node.c1 = min(inp.c1 for inp in input_nodes) + 1
-
-        elif node.gate_type == "NAND":
-            node.c0 = sum(inp.c1 for inp in input_nodes) + 1
-            node.c1 = min(inp.c0 for inp in input_nodes) + 1
-
-        elif node.gate_type == "NOR":
-            node.c0 = min(inp.c1 for inp in input_nodes) + 1
-            node.c1 = sum(inp.c0 for inp in input_nodes) + 1
-
-        elif node.gate_type == "NOT":
-            node.c0 = input_nodes[0].c1 + 1
-            node.c1 = input_nodes[0].c0 + 1
-
-        elif node.gate_type == "BUFFER":
-            node.c0 = input_nodes[0].c0
-            node.c1 = input_nodes[0].c1
-
+    compiled = compile_nodes(nodes)
+    cc0, cc1 = scoap_controllability(compiled)
+    for i, name in enumerate(compiled.netlist.names):
+        nodes[name].c0, nodes[name].c1 = int(cc0[i]), int(cc1[i])
     return nodes
 
-def evaluate_circuit(nodes, input_values):
-    # Set the input values and update c0, c1 for input nodes
-    for input_node in nodes.values():
-        if input_node.gate_type is None:  # Input node
-            input_node.value = input_values[input_node.name]
-            # Controllability should not be updated directly, only through gate propagation
-            # Update controllability values for inputs based on gate outcomes
-            if input_node.value == 0:
-                input_node.c0 += 1
-            else:
-                input_node.c1 += 1
-
-    # Propagate the values through the gates
-    for node in nodes.values():
-        if node.gate_type is None:  # Skip input nodes
-            continue
-
+def evaluate_circuit(nodes, input_values, order=None):
+    # Set the input values (primary inputs and cut flip-flop outputs) and update c0, c1 for them
+    for name, value in input_values.items():
+        input_node = nodes[name]
+        input_node.value = value
+        # Controllability should not be updated directly, only through gate propagation
+        # Update controllability values for inputs based on gate outcomes
+        if input_node.value == 0:
+            input_node.c0 += 1
+        else:
+            input_node.c1 += 1
+
+    # Propagate the values through the gates in levelized order
+    if order is None:
+        order = levelized_node_order(nodes)
+    for node in order:
         input_values = [nodes[input_name].value for input_name in node.inputs]
         if node.gate_type == "AND":
             node.value = 1 if all(input_values) else 0
@@ -116,27 +70,40 @@ def evaluate_circuit(nodes, input_values):
             node.value = 0 if all(input_values) else 1
         elif node.gate_type == "NOR":
             node.value = 0 if any(input_values) else 1
+        elif node.gate_type == "XOR":
+            node.value = sum(input_values) % 2  # Odd parity
+        elif node.gate_type == "XNOR":
+            node.value = 1 - sum(input_values) % 2  # Even parity
         elif node.gate_type == "NOT":
             node.value = 1 - input_values[0]  # Invert the input value
-        elif node.gate_type == "BUFFER":
+        elif node.gate_type in ("BUFF", "BUFFER"):
             node.value = input_values[0]  # Pass the value through
 
     return nodes
 
 
-def monte_carlo_simulation(nodes, num_simulations=1000):
+# Patterns come from a seeded PatternStream in batches of 1024, the same
+# patterns monte_carlo_stream simulates for that seed. Flip-flop outputs are
+# driven like inputs, in the same order as compile_nodes cuts them.
+def monte_carlo_simulation(nodes, num_simulations=1000, seed=None):
     # Initialize counts for each node
     node_counts = {node.name: {0: 0, 1: 0} for node in nodes.values()}
     input_counts = {node.name: {0: 0, 1: 0} for node in nodes.values() if node.gate_type is None}
     simulation_results = []
+    compiled = compile_nodes(nodes)  # Levelize once for all simulations
+    order = [nodes[name] for name in compiled.order]
+    input_names = compiled.inputs
+    stream = PatternStream(len(input_names), seed)
 
     # Run the Monte Carlo simulation
     for i in range(num_simulations):
-        # Generate a random input pattern (0 or 1 for each input node)
-        input_values = {input_node.name: random.choice([0, 1]) for input_node in nodes.values() if input_node.gate_type is None}
+        # Take the next random input pattern (0 or 1 for each input node)
+        if i % 1024 == 0:
+            vectors = stream.vectors(i // 1024, min(1024, num_simulations - i))
+        input_values = dict(zip(input_names, vectors[i % 1024]))
 
         # Evaluate the circuit for the current input pattern
-        evaluate_circuit(nodes, input_values)
+        evaluate_circuit(nodes, input_values, order)
 
         # Store the results for each node and the input values
         result = {'serial_no': i + 1, 'input_values': input_values.copy(), 'node_results': {}}
@@ -152,6 +119,22 @@ def monte_carlo_simulation(nodes, num_simulations=1000):
     return node_counts, input_counts, simulation_results
 
 
+# Streaming variant: only running counters per node are kept, so memory stays
+# constant in num_simulations. The per-pattern records, if wanted, go to
+# record_path ("binary": packed bits, or "csv") instead of simulation_results.
+def monte_carlo_stream(nodes, num_simulations=1000, record_path=None, record_format="binary", seed=None, workers=1):
+    compiled = compile_nodes(nodes)
+    ones = monte_carlo_counts(compiled, num_simulations, record_path, record_format, seed=seed, workers=workers)
+
+    node_counts = {node.name: {0: 0, 1: 0} for node in nodes.values()}
+    input_counts = {node.name: {0: 0, 1: 0} for node in nodes.values() if node.gate_type is None}
+    for i, name in enumerate(compiled.netlist.names):
+        counts = input_counts if name in input_counts else node_counts
+        counts[name] = {0: num_simulations - int(ones[i]), 1: int(ones[i])}
+
+    return node_counts, input_counts
+
+
 # Function to print results with percentages for node results
 def print_node_results(node_counts, num_simulations=1000):
     print(f"{'Node':<10} {'0 Count':<10} {'1 Count':<10} {'0 Percentage':<15} {'1 Percentage':<15}")
@@ -186,9 +169,10 @@ def print_simulation_table(simulation_results):
 
 def print_separated_tables(node_counts, input_counts, outputs, simulation_results, num_simulations=10):
 
-    # Print Simulation Summary
-    print("\nSimulation Results Summary:")
-    print_simulation_table(simulation_results)
+    # Print Simulation Summary (not kept in streaming mode)
+    if simulation_results is not None:
+        print("\nSimulation Results Summary:")
+        print_simulation_table(simulation_results)
 
     # Print Inputs
     print("\nInput Nodes Results:")
@@ -207,10 +191,18 @@ def print_separated_tables(node_counts, input_counts, outputs, simulation_result
 
 
 
-def main(file_path, num_simulations=1000):
+# stream=True keeps only counters (see monte_carlo_stream); record_path then
+# optionally receives the per-pattern records. A seed makes the run repeatable.
+def main(file_path, num_simulations=1000, stream=False, record_path=None, record_format="binary", seed=None,
+         workers=1):
     nodes, inputs, outputs, gates = parse_bench_file(file_path)
     nodes = compute_scoap(nodes)
-    node_counts, input_counts, simulation_results = monte_carlo_simulation(nodes, num_simulations)
+    if stream:
+        node_counts, input_counts = monte_carlo_stream(nodes, num_simulations, record_path, record_format, seed,
+                                                       workers)
+        simulation_results = None
+    else:
+        node_counts, input_counts, simulation_results = monte_carlo_simulation(nodes, num_simulations, seed)
     print_separated_tables(node_counts, input_counts, outputs, simulation_results, num_simulations)
 
 # file path
@@ -1,4 +1,5 @@
-import re
+from netlist import compile_nodes, parse_bench_file as read_bench_file
+from testability import UNOBSERVABLE, scoap_controllability, scoap_observability
 
 # Node class to represent each component in the circuit
 class Node:
@@ -6,97 +7,56 @@ class Node:
         self.name = name
         self.c0 = 0  # Controllability 0
         self.c1 = 0  # Controllability 1
+        self.co = None  # Observability (None when not reachable from an output)
         self.inputs = []
         self.gate_type = None
 
     def __repr__(self):
-        return f"{self.name}: C0 = {self.c0}, C1 = {self.c1}"
+        return f"{self.name}: C0 = {self.c0}, C1 = {self.c1}, CO = {self.co}"
 
 
 # Function to parse the bench file
 def parse_bench_file(file_path):
     nodes = {}
     inputs = []
-    outputs = []
     gates = []
 
-    with open(file_path, "r") as file:
-        for line in file:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-
-            # Match INPUT, OUTPUT
-            if line.startswith("INPUT("):
-                input_name = re.search(r"INPUT\((\w+)\)", line).group(1)
-                node = Node(input_name)
-                node.c0, node.c1 = 1, 1  # Inputs default to C0=1, C1=1
-                nodes[input_name] = node
-                inputs.append(node)
-
-            elif line.startswith("OUTPUT("):
-                output_name = re.search(r"OUTPUT\((\w+)\)", line).group(1)
-                outputs.append(output_name)
-
-            # Match gates
-            else:
-                gate_match = re.match(r"(\w+)\s*=\s*(\w+)\(([\w,\s]+)\)", line)
-                if gate_match:
-                    node_name, gate_type, gate_inputs = gate_match.groups()
-                    gate_inputs = gate_inputs.replace(" ", "").split(",")
-                    node = Node(node_name)
-                    node.gate_type = gate_type.upper()
-                    node.inputs = gate_inputs
-                    nodes[node_name] = node
-                    gates.append(node)
+    input_names, outputs, gate_info = read_bench_file(file_path)
+    for input_name in input_names:
+        node = Node(input_name)
+        node.c0, node.c1 = 1, 1  # Inputs default to C0=1, C1=1
+        nodes[input_name] = node
+        inputs.append(node)
 
-    return nodes, inputs, outputs, gates
-
-
-# Function to compute SCOAP metrics
-def compute_scoap(nodes):
-    def get_node(name):
-        return nodes[name]
-
-    for node in nodes.values():
-        if node.gate_type is None:  # Skip inputs
-            continue
-
-        input_nodes = [get_node(inp) for inp in node.inputs]
+    for node_name, info in gate_info.items():
+        node = Node(node_name)
+        node.gate_type = info['type'].upper()
+        node.inputs = info['inputs']
+        nodes[node_name] = node
+        gates.append(node)
 
-        if node.gate_type == "AND":
-            node.c0 = min(inp.c0 for inp in input_nodes) + 1
-            node.c1 = sum(inp.c1 for inp in input_nodes) + 1
-
-        elif node.gate_type == "OR":
-            node.c0 = sum(inp.c0 for inp in input_nodes) + 1
-            node.c1 = min(inp.c1 for inp in input_nodes) + 1
-
-        elif node.gate_type == "NAND":
-            node.c0 = sum(inp.c1 for inp in input_nodes) + 1
-            node.c1 = min(inp.c0 for inp in input_nodes) + 1
-
-        elif node.gate_type == "NOR":
-            node.c0 = min(inp.c1 for inp in input_nodes) + 1
-            node.c1 = sum(inp.c0 for inp in input_nodes) + 1
-
-        elif node.gate_type == "NOT":
-            node.c0 = input_nodes[0].c1 + 1
-            node.c1 = input_nodes[0].c0 + 1
+    return nodes, inputs, outputs, gates
 
-        elif node.gate_type == "BUFFER":
-            node.c0 = input_nodes[0].c0
-            node.c1 = input_nodes[0].c1
 
+# Function to compute SCOAP metrics (levelized, so any gate order in the file works)
+# CO is measured from the given outputs
+def compute_scoap(nodes, outputs=()):
+    compiled = compile_nodes(nodes, outputs)
+    cc0, cc1 = scoap_controllability(compiled)
+    co = scoap_observability(compiled, cc0, cc1)
+    for i, name in enumerate(compiled.netlist.names):
+        nodes[name].c0, nodes[name].c1 = int(cc0[i]), int(cc1[i])
+        nodes[name].co = int(co[i]) if co[i] < UNOBSERVABLE else None
     return nodes
 
 
 # Function to print SCOAP results
 def print_scoap_results(nodes):
-    print(f"{'Node':<10} {'C0':<10} {'C1':<10}")
-    print("-" * 30)
+    print(f"{'Node':<10} {'C0':<10} {'C1':<10} {'CO':<10}")
+    print("-" * 40)
     for node in nodes.values():
-        print(f"{node.name:<10} {node.c0:<10} {node.c1:<10}")
+        co = '-' if node.co is None else node.co
+        print(f"{node.name:<10} {node.c0:<10} {node.c1:<10} {co:<10}")
 
 
 if __name__ == "__main__":
@@ -107,7 +67,7 @@ if __name__ == "__main__":
     nodes, inputs, outputs, gates = parse_bench_file(bench_file)
 
     # Compute SCOAP metrics
-    compute_scoap(nodes)
+    compute_scoap(nodes, outputs)
 
     # Print results
     print_scoap_results(nodes)
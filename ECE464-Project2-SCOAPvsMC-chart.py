@@ -1,5 +1,5 @@
-import random
-import re
+from netlist import compile_nodes, parse_bench_file as read_bench_file
+from testability import monte_carlo_probabilities, scoap_controllability, signal_probabilities
 import matplotlib.pyplot as plt
 import pandas as pd
 
@@ -21,124 +21,63 @@ class Node:
 def parse_bench_file(file_path):
     nodes = {}
     inputs = []
-    outputs = []
     gates = []
 
-    with open(file_path, "r") as file:
-        for line in file:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-
-            # Match INPUT, OUTPUT
-            if line.startswith("INPUT("):
-                input_name = re.search(r"INPUT\((\w+)\)", line).group(1)
-                node = Node(input_name)
-                node.c0, node.c1 = 1, 1  # Inputs default to C0=1, C1=1
-                nodes[input_name] = node
-                inputs.append(node)
-
-            elif line.startswith("OUTPUT("):
-                output_name = re.search(r"OUTPUT\((\w+)\)", line).group(1)
-                outputs.append(output_name)
-
-            # Match gates
-            else:
-                gate_match = re.match(r"(\w+)\s*=\s*(\w+)\(([\w,\s]+)\)", line)
-                if gate_match:
-                    node_name, gate_type, gate_inputs = gate_match.groups()
-                    gate_inputs = gate_inputs.replace(" ", "").split(",")
-                    node = Node(node_name)
-                    node.gate_type = gate_type.upper()
-                    node.inputs = gate_inputs
-                    nodes[node_name] = node
-                    gates.append(node)
+    input_names, outputs, gate_info = read_bench_file(file_path)
+    for input_name in input_names:
+        node = Node(input_name)
+        node.c0, node.c1 = 1, 1  # Inputs default to C0=1, C1=1
+        nodes[input_name] = node
+        inputs.append(node)
+
+    for node_name, info in gate_info.items():
+        node = Node(node_name)
+        node.gate_type = info['type'].upper()
+        node.inputs = info['inputs']
+        nodes[node_name] = node
+        gates.append(node)
 
     return nodes, inputs, outputs, gates
 
 
-# Function to compute SCOAP metrics
+# Function to compute SCOAP metrics (levelized, so any gate order in the file works)
 def compute_scoap(nodes):
-    def get_node(name):
-        return nodes[name]
-
-    for node in nodes.values():
-        if node.gate_type is None:  # Skip inputs
-            continue
-
-        input_nodes = [get_node(inp) for inp in node.inputs]
-
-        if node.gate_type == "AND":
-            node.c0 = min(inp.c0 for inp in input_nodes) + 1
-            node.c1 = sum(inp.c1 for inp in input_nodes) + 1
-
-        elif node.gate_type == "OR":
-            node.c0 = sum(inp.c0 for inp in input_nodes) + 1
-            node.c1 = min(inp.c1 for inp in input_nodes) + 1
-
-        elif node.gate_type == "NAND":
-            node.c0 = sum(inp.c1 for inp in input_nodes) + 1
-            node.c1 = min(inp.c0 for inp in input_nodes) + 1
-
-        elif node.gate_type == "NOR":
-            node.c0 = min(inp.c1 for inp in input_nodes) + 1
-            node.c1 = sum(inp.c0 for inp in input_nodes) + 1
-
-        elif node.gate_type == "NOT":
-            node.c0 = input_nodes[0].c1 + 1
-            node.c1 = input_nodes[0].c0 + 1
-
-        elif node.gate_type == "BUFFER":
-            node.c0 = input_nodes[0].c0
-            node.c1 = input_nodes[0].c1
-
+    compiled = compile_nodes(nodes)
+    cc0, cc1 = scoap_controllability(compiled)
+    for i, name in enumerate(compiled.netlist.names):
+        nodes[name].c0, nodes[name].c1 = int(cc0[i]), int(cc1[i])
     return nodes
 
 
-# Function to evaluate circuit for Monte Carlo simulation
-def evaluate_circuit(nodes, input_values):
-    for input_node in nodes.values():
-        if input_node.gate_type is None:  # Input node
-            input_node.value = input_values[input_node.name]
-
-    for node in nodes.values():
-        if node.gate_type is None:
-            continue
+# Function for Monte Carlo simulation (using probabilities). Patterns are
+# simulated 64 per word (see testability.monte_carlo_probabilities); with
+# num_simulations=None the run stops once every node's probability is within
+# +/- tolerance at 95% confidence. A seed makes the run repeatable, also when
+# it is split over several worker processes.
+def monte_carlo_simulation(nodes, num_simulations=None, tolerance=0.01, seed=None, workers=1):
+    compiled = compile_nodes(nodes)
+    if num_simulations is None:
+        p1, patterns = monte_carlo_probabilities(compiled, tolerance, seed=seed, workers=workers)
+    else:
+        p1, patterns = monte_carlo_probabilities(compiled, tolerance=0, max_patterns=num_simulations, seed=seed,
+                                                 workers=workers)
+    print(f"Monte Carlo simulation used {patterns} patterns")
 
-        input_values = [nodes[input_name].value for input_name in node.inputs]
-        if node.gate_type == "AND":
-            node.value = 1 if all(input_values) else 0
-        elif node.gate_type == "OR":
-            node.value = 1 if any(input_values) else 0
-        elif node.gate_type == "NAND":
-            node.value = 0 if all(input_values) else 1
-        elif node.gate_type == "NOR":
-            node.value = 0 if any(input_values) else 1
-        elif node.gate_type == "NOT":
-            node.value = 1 - input_values[0]
-        elif node.gate_type == "BUFFER":
-            node.value = input_values[0]
-
-    return nodes
-
-
-# Function for Monte Carlo simulation (using probabilities)
-def monte_carlo_simulation(nodes, num_simulations=1000):
     node_probs = {node.name: {0: 0, 1: 0} for node in nodes.values()}
+    for i, name in enumerate(compiled.netlist.names):
+        node_probs[name] = {0: 1 - float(p1[i]), 1: float(p1[i])}
+    return node_probs
 
-    for _ in range(num_simulations):
-        input_values = {node.name: random.choice([0, 1]) for node in nodes.values() if node.gate_type is None}
-        evaluate_circuit(nodes, input_values)
-
-        for node in nodes.values():
-            if node.value is not None:
-                node_probs[node.name][node.value] += 1
-
-    # Convert counts to probabilities
-    for node in node_probs:
-        node_probs[node][0] /= num_simulations
-        node_probs[node][1] /= num_simulations
 
+# Analytic COP signal probabilities in the same {node: {0: p0, 1: p1}} form as
+# monte_carlo_simulation. With samples > 0 the nodes below reconvergent fanout
+# are re-estimated by bit-parallel sampling (see testability.py).
+def cop_simulation(nodes, samples=0):
+    compiled = compile_nodes(nodes)
+    p1 = signal_probabilities(compiled, samples)
+    node_probs = {node.name: {0: 0, 1: 0} for node in nodes.values()}
+    for i, name in enumerate(compiled.netlist.names):
+        node_probs[name] = {0: 1 - float(p1[i]), 1: float(p1[i])}
     return node_probs
 
 
@@ -195,7 +134,7 @@ def visualize_comparison_separated(comparison_data, category):
     plt.show()
 
 # Function to compare SCOAP and MC for each node, categorizing as input, intermediary, output
-def compare_scoap_mc_separated(nodes, scoap_results, mc_results):
+def compare_scoap_mc_separated(nodes, scoap_results, mc_results, output_nodes):
     comparison_data = []
     for node_name, node in nodes.items():
         if node_name not in scoap_results:
@@ -250,20 +189,25 @@ def analyze_results(comparison_data):
     print(f"Output Nodes - SCOAP C0: {output_avg[0]:.2f}, SCOAP C1: {output_avg[1]:.2f}, MC C0: {output_avg[2]:.2f}, MC C1: {output_avg[3]:.2f}, C0 Error: {output_avg[4]:.2f}%, C1 Error: {output_avg[5]:.2f}%")
 
 
-# Main code
-if __name__ == "__main__":
-    file_path = "c432.bench"
+# Main code. probability_mode "mc" runs the Monte Carlo simulation, "cop"
+# the analytic COP pass.
+def main(file_path="c432.bench", probability_mode="mc"):
     nodes, input_nodes, output_nodes, gates = parse_bench_file(file_path)
 
     # Compute SCOAP values
     scoap_results = compute_scoap(nodes)
     scoap_results = normalize_scoap_to_percentages(scoap_results)
 
-    # Run Monte Carlo simulation
-    mc_results = monte_carlo_simulation(nodes)
+    # Signal probabilities
+    if probability_mode == "cop":
+        mc_results = cop_simulation(nodes, samples=4096)
+    elif probability_mode == "mc":
+        mc_results = monte_carlo_simulation(nodes)
+    else:
+        raise ValueError(f"Unknown probability mode: {probability_mode}")
 
     # Compare SCOAP vs MC with categories
-    comparison_data = compare_scoap_mc_separated(nodes, scoap_results, mc_results)
+    comparison_data = compare_scoap_mc_separated(nodes, scoap_results, mc_results, output_nodes)
 
     # Visualize results separately for Input, Intermediary, and Output nodes
     for category in ["Input", "Intermediary", "Output"]:
@@ -272,3 +216,6 @@ if __name__ == "__main__":
     # Analyze the results
     analyze_results(comparison_data)
 
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+import heapq
+import sys
+import time
+from fault_sim import ConcurrentFaultSimulator, collapse_faults, compact_test_set, generate_fault_universe, parse_fault
+from netlist import load_circuit
+from patterns import PatternStream
+from sat_solver import SatSolver
+from testability import compute_scoap
+
+# PODEM test generation on the compiled integer netlist. Every node carries a
+# good and a faulty value, each 0, 1 or X, which together give the five PODEM
+# values (D = good 1 / faulty 0). Decisions are made only on primary inputs:
+# an objective (activate the fault, or push the effect through a D-frontier
+# gate) is backtraced to an unassigned input with the SCOAP controllabilities,
+# the input is set and implied event-driven through its fanout cone, and on a
+# conflict the most recent untried decision is flipped.
+
+X = 2
+
+DETECTED = 'detected'
+UNTESTABLE = 'untestable'
+ABORTED = 'aborted'
+
+
+# Three-valued evaluation of one rail (values 0, 1 or X)
+def evaluate_gate_3v(kind, values):
+    if kind == 'AND' or kind == 'NAND':
+        if 0 in values:
+            value = 0
+        elif X in values:
+            return X
+        else:
+            value = 1
+        return value ^ 1 if kind == 'NAND' else value
+    elif kind == 'OR' or kind == 'NOR':
+        if 1 in values:
+            value = 1
+        elif X in values:
+            return X
+        else:
+            value = 0
+        return value ^ 1 if kind == 'NOR' else value
+    elif kind == 'XOR' or kind == 'XNOR':
+        if X in values:
+            return X
+        return (sum(values) & 1) ^ (kind == 'XNOR')
+    elif kind == 'NOT':
+        return X if values[0] == X else values[0] ^ 1
+    return values[0]  # BUFFER and default behavior
+
+
+# Per-node gate kind, fanin and fanout tuples and output flags of a netlist,
+# as plain lists for the search loops below
+def node_structure(netlist):
+    count = len(netlist.names)
+    kinds = [netlist.kinds[netlist.opcodes[node]] for node in range(count)]
+    fanins = [tuple(netlist.fanin[netlist.fanin_start[node]:netlist.fanin_start[node + 1]])
+              for node in range(count)]
+    return kinds, fanins, netlist.fanout_lists, netlist.is_output
+
+
+class Podem:
+    def __init__(self, compiled, backtrack_limit=100):
+        netlist = compiled.netlist
+        self.compiled = compiled
+        self.netlist = netlist
+        self.backtrack_limit = backtrack_limit
+        self.num_inputs = netlist.num_inputs
+        self.kinds, self.fanins, self.fanouts, self.is_output = node_structure(netlist)
+
+        # SCOAP guidance (the measures of the Project 2 SCOAP script)
+        cc0, cc1, co = compute_scoap(compiled)
+        self.cc0, self.cc1, self.co = cc0.tolist(), cc1.tolist(), co.tolist()
+
+    # Generate a test for one fault ("node-sa-v" or "gate.input-sa-v").
+    # Returns (status, cube, backtracks); cube maps input IDs to the values
+    # the test needs (the other inputs are don't-cares).
+    def generate(self, fault):
+        node, value, branch_gate = parse_fault(fault)
+        ids = self.netlist.ids
+        self.site = ids[node]
+        self.stuck = value
+        self.branch_gate = None if branch_gate is None else ids[branch_gate]
+        self.good = [X] * len(self.kinds)
+        self.faulty = [X] * len(self.kinds)
+        self.effects = set()  # Nodes where good and faulty are both known and differ
+        if self.branch_gate is None:
+            self.faulty[self.site] = value
+            self._propagate(self.fanouts[self.site])
+
+        decisions = []  # [input, value, alternative tried]
+        backtracks = 0
+        while True:
+            status = self._status()
+            if status == DETECTED:
+                return DETECTED, {pi: self.good[pi] for pi, _, _ in decisions}, backtracks
+            objective = self._objective() if status is None else None
+            if objective is not None:
+                pi, pi_value = self._backtrace(*objective)
+                decisions.append([pi, pi_value, False])
+                self._assign(pi, pi_value)
+                continue
+
+            # Conflict: undo exhausted decisions, then flip the latest one
+            while decisions and decisions[-1][2]:
+                self._assign(decisions.pop()[0], X)
+            if not decisions:
+                return UNTESTABLE, None, backtracks
+            if backtracks >= self.backtrack_limit:
+                return ABORTED, None, backtracks
+            backtracks += 1
+            decision = decisions[-1]
+            decision[1] ^= 1
+            decision[2] = True
+            self._assign(decision[0], decision[1])
+
+    # DETECTED, UNTESTABLE for a conflict in the current assignment, or None
+    def _status(self):
+        for node in self.effects:
+            if self.is_output[node]:
+                return DETECTED
+        if self.good[self.site] == self.stuck:
+            return UNTESTABLE  # Fault cannot be activated
+        if self.good[self.site] != X and not self._d_frontier():
+            return UNTESTABLE  # Fault effect cannot propagate any further
+        return None
+
+    # Gates with an X output and a fault effect on an input, keeping only
+    # those with a path of X nodes to a primary output (X-path check)
+    def _d_frontier(self):
+        good, faulty = self.good, self.faulty
+        frontier = set()
+        for node in self.effects:
+            for gate in self.fanouts[node]:
+                if good[gate] == X or faulty[gate] == X:
+                    frontier.add(gate)
+        gate = self.branch_gate
+        if gate is not None and good[self.site] != X and (good[gate] == X or faulty[gate] == X):
+            frontier.add(gate)
+        return [gate for gate in frontier if self._x_path(gate)]
+
+    # Whether some path of nodes with an unknown rail leads from gate to an output
+    def _x_path(self, gate):
+        good, faulty = self.good, self.faulty
+        stack = [gate]
+        seen = {gate}
+        while stack:
+            node = stack.pop()
+            if self.is_output[node]:
+                return True
+            for fanout in self.fanouts[node]:
+                if fanout not in seen and (good[fanout] == X or faulty[fanout] == X):
+                    seen.add(fanout)
+                    stack.append(fanout)
+        return False
+
+    # Next (node, value) goal: activate the fault, then drive a non-controlling
+    # value onto an X input of the most observable D-frontier gate
+    def _objective(self):
+        good, faulty = self.good, self.faulty
+        if good[self.site] == X:
+            return self.site, self.stuck ^ 1
+
+        for gate in sorted(self._d_frontier(), key=self.co.__getitem__):
+            kind = self.kinds[gate]
+            if kind == 'AND' or kind == 'NAND':
+                value = 1
+            elif kind == 'OR' or kind == 'NOR':
+                value = 0
+            else:
+                value = 0  # XOR/XNOR (and single-input gates): either value propagates
+            open_inputs = ([inp for inp in self.fanins[gate] if good[inp] == X]
+                           or [inp for inp in self.fanins[gate] if faulty[inp] == X])
+            if open_inputs:
+                cc = self.cc1 if value else self.cc0
+                return min(open_inputs, key=cc.__getitem__), value
+        return None
+
+    # Walk an objective back to an unassigned primary input. Where one input
+    # suffices, take the easiest (lowest SCOAP controllability); where all
+    # inputs are needed, take the hardest first.
+    def _backtrace(self, node, value):
+        good, faulty, cc0, cc1 = self.good, self.faulty, self.cc0, self.cc1
+        while node >= self.num_inputs:
+            kind = self.kinds[node]
+            if kind == 'NAND' or kind == 'NOR' or kind == 'XNOR' or kind == 'NOT':
+                value ^= 1
+            inputs = self.fanins[node]
+            # Follow unknown good values; a known good value with an unknown
+            # faulty one still leads back to an unassigned input
+            open_inputs = ([inp for inp in inputs if good[inp] == X]
+                           or [inp for inp in inputs if faulty[inp] == X])
+            if kind == 'AND' or kind == 'NAND':
+                node = (min(open_inputs, key=cc0.__getitem__) if value == 0
+                        else max(open_inputs, key=cc1.__getitem__))
+            elif kind == 'OR' or kind == 'NOR':
+                node = (min(open_inputs, key=cc1.__getitem__) if value == 1
+                        else max(open_inputs, key=cc0.__getitem__))
+            elif kind == 'XOR' or kind == 'XNOR':
+                # Aim for the parity that the known inputs leave, assuming the
+                # other unknown inputs end up 0
+                for inp in inputs:
+                    if good[inp] != X:
+                        value ^= good[inp]
+                node = min(open_inputs, key=lambda inp: cc1[inp] if value else cc0[inp])
+            else:
+                node = open_inputs[0]
+        return node, value
+
+    def _assign(self, pi, value):
+        self.good[pi] = value
+        self.faulty[pi] = self.stuck if pi == self.site and self.branch_gate is None else value
+        self._update_effect(pi)
+        self._propagate(self.fanouts[pi])
+
+    def _update_effect(self, node):
+        good_value, faulty_value = self.good[node], self.faulty[node]
+        if good_value != X and faulty_value != X and good_value != faulty_value:
+            self.effects.add(node)
+        else:
+            self.effects.discard(node)
+
+    # Event-driven implication in node ID (topological) order
+    def _propagate(self, gates):
+        good, faulty, kinds, fanins = self.good, self.faulty, self.kinds, self.fanins
+        events = list(set(gates))
+        heapq.heapify(events)
+        queued = set(events)
+        while events:
+            gate = heapq.heappop(events)
+            queued.discard(gate)
+            inputs = fanins[gate]
+            good_value = evaluate_gate_3v(kinds[gate], [good[inp] for inp in inputs])
+            if gate == self.site and self.branch_gate is None:
+                faulty_value = self.stuck
+            elif gate == self.branch_gate:
+                faulty_value = evaluate_gate_3v(kinds[gate], [self.stuck if inp == self.site else faulty[inp]
+                                                              for inp in inputs])
+            else:
+                faulty_value = evaluate_gate_3v(kinds[gate], [faulty[inp] for inp in inputs])
+            if good_value == good[gate] and faulty_value == faulty[gate]:
+                continue
+            good[gate] = good_value
+            faulty[gate] = faulty_value
+            self._update_effect(gate)
+            for fanout in self.fanouts[gate]:
+                if fanout not in queued:
+                    queued.add(fanout)
+                    heapq.heappush(events, fanout)
+
+
+# SAT-based test generation for the faults PODEM gives up on. The miter holds
+# the good circuit over the fanin support of the outputs the fault can reach
+# and a faulty copy of the fault's fanout cone only (everything else is shared
+# with the good circuit), and asks for a difference on one of those outputs.
+# A satisfying assignment is a test; unsatisfiability proves the fault
+# redundant.
+class SatAtpg:
+    def __init__(self, compiled, conflict_limit=10000):
+        netlist = compiled.netlist
+        self.compiled = compiled
+        self.netlist = netlist
+        self.conflict_limit = conflict_limit
+        self.num_inputs = netlist.num_inputs
+        self.kinds, self.fanins, self.fanouts, self.is_output = node_structure(netlist)
+
+    # Same interface as Podem.generate: (status, cube, conflicts)
+    def generate(self, fault):
+        node, value, branch_gate = parse_fault(fault)
+        ids = self.netlist.ids
+        site = ids[node]
+        branch = None if branch_gate is None else ids[branch_gate]
+        kinds, fanins, fanouts = self.kinds, self.fanins, self.fanouts
+
+        cone = {site if branch is None else branch}
+        stack = list(cone)
+        while stack:
+            for fanout in fanouts[stack.pop()]:
+                if fanout not in cone:
+                    cone.add(fanout)
+                    stack.append(fanout)
+        observed = sorted(node for node in cone if self.is_output[node])
+        if not observed:
+            return UNTESTABLE, None, 0
+
+        support = set(observed)
+        stack = list(observed)
+        while stack:
+            for fanin in fanins[stack.pop()]:
+                if fanin not in support:
+                    support.add(fanin)
+                    stack.append(fanin)
+
+        solver = SatSolver()
+        stuck = solver.new_var()
+        solver.add_clause([stuck if value else -stuck])
+        good = {}
+        for node in sorted(support):
+            good[node] = solver.new_var()
+            if node >= self.num_inputs:
+                encode_gate(solver, kinds[node], good[node], [good[fanin] for fanin in fanins[node]])
+        faulty = {}
+        for node in sorted(cone & support):
+            if node == site and branch is None:
+                faulty[node] = stuck
+                continue
+            faulty[node] = solver.new_var()
+            if node == branch:
+                inputs = [stuck if fanin == site else good[fanin] for fanin in fanins[node]]
+            else:
+                inputs = [faulty.get(fanin, good[fanin]) for fanin in fanins[node]]
+            encode_gate(solver, kinds[node], faulty[node], inputs)
+
+        # Activate the fault and require a difference at some observed output
+        solver.add_clause([-good[site] if value else good[site]])
+        differences = []
+        for node in observed:
+            difference = solver.new_var()
+            solver.add_clause([-difference, good[node], faulty[node]])
+            solver.add_clause([-difference, -good[node], -faulty[node]])
+            differences.append(difference)
+        solver.add_clause(differences)
+
+        result = solver.solve(self.conflict_limit)
+        if result is None:
+            return ABORTED, None, solver.conflicts
+        if not result:
+            return UNTESTABLE, None, solver.conflicts
+        cube = {node: int(solver.model[good[node]]) for node in support if node < self.num_inputs}
+        return DETECTED, cube, solver.conflicts
+
+
+# Tseitin clauses for out = kind(inputs) over solver literals
+def encode_gate(solver, kind, out, inputs):
+    if kind == 'NAND' or kind == 'NOR' or kind == 'XNOR' or kind == 'NOT':
+        out = -out
+    if kind == 'AND' or kind == 'NAND':
+        for literal in inputs:
+            solver.add_clause([-out, literal])
+        solver.add_clause([out] + [-literal for literal in inputs])
+    elif kind == 'OR' or kind == 'NOR':
+        for literal in inputs:
+            solver.add_clause([out, -literal])
+        solver.add_clause([-out] + list(inputs))
+    elif (kind == 'XOR' or kind == 'XNOR') and len(inputs) > 1:
+        parity = inputs[0]
+        for position in range(1, len(inputs)):
+            literal = inputs[position]
+            result = out if position == len(inputs) - 1 else solver.new_var()
+            solver.add_clause([-result, parity, literal])
+            solver.add_clause([-result, -parity, -literal])
+            solver.add_clause([result, -parity, literal])
+            solver.add_clause([result, parity, -literal])
+            parity = result
+    else:  # NOT, BUFFER and default behavior
+        solver.add_clause([-out, inputs[0]])
+        solver.add_clause([out, -inputs[0]])
+
+
+# Deterministic test generation for fault_list. Each generated cube is filled
+# with random values (a reproducible PatternStream, one batch per test) and
+# fault simulated with the concurrent engine, which drops every other fault the
+# test detects before PODEM gets to it. With sat=True the faults PODEM aborts
+# on and no later test catches are retried with the SAT engine, which either
+# finds a test or proves them untestable.
+# Returns (tests, detected, untestable, aborted).
+def podem_atpg(compiled, fault_list, backtrack_limit=100, seed=None, sat=False, conflict_limit=10000):
+    simulator = ConcurrentFaultSimulator(compiled, fault_list)
+    stream = PatternStream(len(compiled.inputs), seed)
+    tests = []
+    untestable = []
+    aborted = list(fault_list)
+
+    engines = [Podem(compiled, backtrack_limit)]
+    if sat:
+        engines.append(SatAtpg(compiled, conflict_limit))
+    for engine in engines:
+        remaining = aborted
+        aborted = []
+        for fault in remaining:
+            if fault in simulator.detected:
+                continue
+            status, cube, _ = engine.generate(fault)
+            if status == UNTESTABLE:
+                untestable.append(fault)
+                continue
+            if status == ABORTED:
+                aborted.append(fault)
+                continue
+            test_vector = stream.vectors(len(tests), 1)[0]
+            for pi, value in cube.items():
+                test_vector[pi] = value
+            simulator.apply(test_vector)
+            tests.append(test_vector)
+
+    # Later tests may still have caught a fault that was given up on
+    aborted = [fault for fault in aborted if fault not in simulator.detected]
+    return tests, simulator.detected, untestable, aborted
+
+
+# Detected faults over the faults not proven untestable (redundant), in percent
+def test_efficiency(num_faults, num_detected, num_untestable):
+    testable = num_faults - num_untestable
+    return 100 * num_detected / testable if testable else 100.0
+
+
+def main():
+    circuits = sys.argv[1:] or ['c17.bench', 'c432.bench', 'c880.bench', 'c2670.bench', 'c7552.bench']
+
+    for circuit_file in circuits:
+        compiled = load_circuit(circuit_file)
+        fault_list, _ = collapse_faults(compiled, generate_fault_universe(compiled))
+
+        start_time = time.time()
+        tests, detected, untestable, aborted = podem_atpg(compiled, fault_list, seed=0, sat=True)
+        atpg_time = time.time() - start_time
+
+        coverage = 100 * len(detected) / len(fault_list)
+        efficiency = test_efficiency(len(fault_list), len(detected), len(untestable))
+        print(f"{circuit_file}: {len(fault_list)} collapsed faults, {len(tests)} tests, "
+              f"coverage {coverage:.2f}%, test efficiency {efficiency:.2f}%")
+        print(f"  Untestable: {len(untestable)}, aborted: {len(aborted)}, time: {atpg_time:.2f} seconds")
+        compacted, _ = compact_test_set(compiled, fault_list, tests)
+        print(f"  Compacted test set: {len(compacted)} tests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import glob
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+from fault_sim import collapse_faults, generate_fault_universe, ppsfp_fault_simulation
+from netlist import CompiledCircuit, load_circuit, parse_bench_file
+from numpy_sim import NumpySimulator
+from patterns import PatternStream
+from testability import compute_scoap, monte_carlo_counts
+
+# Benchmark harness over every ISCAS-85 (c*.bench) and ISCAS-89
+# (seq_benches/s*.bench) circuit in the repo. Each bench runs in a fresh
+# worker process so its peak memory (ru_maxrss) is its own; sequential benches
+# are measured on their combinational core with the flip-flops cut. Loading
+# is timed both ways: parse plus compile, and from the netlist cache (filled
+# on the first load). Results go to a JSON file and are compared against a
+# stored baseline.
+#
+#   python bench_suite.py                      run everything, compare to baseline
+#   python bench_suite.py c17.bench c432.bench run only these benches
+#   python bench_suite.py --update-baseline    also store the run as the baseline
+
+RESULTS_FILE = 'bench_results.json'
+BASELINE_FILE = 'bench_baseline.json'
+
+GOOD_SIM_PATTERNS = 1 << 14
+FAULT_SIM_PATTERNS = 256
+MONTE_CARLO_PATTERNS = 1 << 14
+SEED = 464
+
+# Each phase runs at least MIN_REPEATS times, then up to REPEATS times while
+# under REPEAT_BUDGET seconds in total, and the fastest run is kept; the
+# minimum over several runs is what keeps timing noise inside TOLERANCE
+MIN_REPEATS = 3
+REPEATS = 25
+REPEAT_BUDGET = 0.5
+
+# Relative change beyond which a metric is reported as a regression
+TOLERANCE = 0.25
+
+# Metric -> True when larger is better
+METRICS = {
+    'parse_time': False,
+    'compile_time': False,
+    'cached_load_time': False,
+    'good_sim_patterns_per_sec': True,
+    'fault_sim_faults_per_sec': True,
+    'scoap_time': False,
+    'monte_carlo_patterns_per_sec': True,
+    'peak_memory_kb': False,
+}
+
+
+def bench_files():
+    return sorted(glob.glob('c*.bench')) + sorted(glob.glob('seq_benches/s*.bench'))
+
+
+# Best wall time of function() and its last result
+def timed(function):
+    best = None
+    spent = 0.0
+    for repeat in range(REPEATS):
+        start_time = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+        spent += elapsed
+        if repeat + 1 >= MIN_REPEATS and spent >= REPEAT_BUDGET:
+            break
+    return best, result
+
+
+# Measure one bench; runs in a worker process of its own
+def measure_bench(file_path):
+    parse_time, (inputs, outputs, gates) = timed(lambda: parse_bench_file(file_path))
+
+    # Levelize and compile (flip-flops become pseudo-inputs and outputs)
+    compile_time, compiled = timed(lambda: CompiledCircuit(inputs, outputs, gates))
+    load_circuit(file_path)
+    cached_load_time, _ = timed(lambda: load_circuit(file_path))
+
+    stream = PatternStream(len(compiled.inputs), SEED)
+    simulator = NumpySimulator(compiled)
+    words = stream.words(0, GOOD_SIM_PATTERNS // 64)
+    good_sim_time, _ = timed(lambda: simulator.simulate_words(words))
+
+    fault_list, _ = collapse_faults(compiled, generate_fault_universe(compiled))
+    test_vectors = stream.vectors(1, FAULT_SIM_PATTERNS)
+    fault_sim_time, (detected, _) = timed(lambda: ppsfp_fault_simulation(compiled, fault_list, test_vectors))
+
+    scoap_time, _ = timed(lambda: compute_scoap(compiled))
+    monte_carlo_time, _ = timed(lambda: monte_carlo_counts(compiled, MONTE_CARLO_PATTERNS, seed=SEED))
+
+    return file_path, {
+        'inputs': len(compiled.inputs),
+        'gates': len(compiled.netlist.sweep),
+        'depth': compiled.depth,
+        'faults': len(fault_list),
+        'fault_coverage': 100 * len(detected) / len(fault_list),
+        'parse_time': parse_time,
+        'compile_time': compile_time,
+        'cached_load_time': cached_load_time,
+        'good_sim_patterns_per_sec': GOOD_SIM_PATTERNS / good_sim_time,
+        'fault_sim_faults_per_sec': len(fault_list) / fault_sim_time,
+        'scoap_time': scoap_time,
+        'monte_carlo_patterns_per_sec': MONTE_CARLO_PATTERNS / monte_carlo_time,
+        'peak_memory_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def run_suite(files):
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'settings': {
+            'good_sim_patterns': GOOD_SIM_PATTERNS,
+            'fault_sim_patterns': FAULT_SIM_PATTERNS,
+            'monte_carlo_patterns': MONTE_CARLO_PATTERNS,
+            'seed': SEED,
+        },
+        'benches': {},
+    }
+    # maxtasksperchild=1 gives every bench a fresh process
+    with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+        for file_path, metrics in pool.imap(measure_bench, files):
+            results['benches'][file_path] = metrics
+            print(f"{file_path}: {metrics['gates']} gates, parse {metrics['parse_time']:.3f} s, "
+                  f"{metrics['good_sim_patterns_per_sec']:.0f} patterns/s, "
+                  f"{metrics['fault_sim_faults_per_sec']:.0f} faults/s, "
+                  f"peak {metrics['peak_memory_kb'] / 1024:.0f} MB")
+    return results
+
+
+# Relative change of every metric against the baseline; returns the list of
+# (bench, metric, baseline, current, change) beyond tolerance in the bad direction
+def compare_results(results, baseline, tolerance=TOLERANCE):
+    regressions = []
+    for file_path, metrics in results['benches'].items():
+        reference = baseline.get('benches', {}).get(file_path)
+        if reference is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if not reference.get(metric):
+                continue
+            change = (metrics[metric] - reference[metric]) / reference[metric]
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append((file_path, metric, reference[metric], metrics[metric], change))
+    return regressions
+
+
+def main():
+    args = sys.argv[1:]
+    update_baseline = '--update-baseline' in args
+    files = [arg for arg in args if arg != '--update-baseline'] or bench_files()
+
+    results = run_suite(files)
+    with open(RESULTS_FILE, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"\nResults written to {RESULTS_FILE}")
+
+    try:
+        with open(BASELINE_FILE) as file:
+            baseline = json.load(file)
+    except FileNotFoundError:
+        baseline = None
+
+    if baseline is not None:
+        regressions = compare_results(results, baseline)
+        compared = sum(1 for file_path in results['benches'] if file_path in baseline.get('benches', {}))
+        print(f"Compared {compared} benches against {BASELINE_FILE}: {len(regressions)} regressions "
+              f"(beyond {TOLERANCE:.0%})")
+        for file_path, metric, before, after, change in regressions:
+            print(f"  {file_path} {metric}: {before:.4g} -> {after:.4g} ({change:+.0%})")
+
+    if update_baseline or baseline is None:
+        if baseline is not None:
+            # Keep entries for benches this run skipped
+            baseline['benches'].update(results['benches'])
+            results['benches'] = baseline['benches']
+        with open(BASELINE_FILE, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline written to {BASELINE_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,571 @@
+import heapq
+import multiprocessing
+import os
+import simstats
+from netlist import evaluate_gate, evaluate_gate_packed, pack_vectors
+
+# Stuck-at fault simulation engines shared by the project scripts. Faults use
+# the "node-sa-value" strings of Project-C3/C4/D for stem faults and the
+# "gate.input-sa-value" strings of Project-A for faults on the fanout branch
+# of input that feeds gate.
+
+# Patterns packed into each word by the bit-parallel engines
+PATTERNS_PER_BATCH = 1024
+
+
+# Split a fault string into (node, value, branch_gate); branch_gate is None for
+# a stem fault, otherwise the gate whose input pin on node is stuck
+def parse_fault(fault_str):
+    site, value = fault_str.split('-sa-')
+    if '.' in site:
+        gate, node = site.split('.', 1)
+        return node, int(value), gate
+    return site, int(value), None
+
+
+# parse_fault with the node and branch gate as node IDs of compiled.netlist
+def fault_site(compiled, fault_str):
+    node, value, branch_gate = parse_fault(fault_str)
+    ids = compiled.netlist.ids
+    return ids[node], value, None if branch_gate is None else ids[branch_gate]
+
+
+# Parallel-pattern single-fault propagation: inject the fault on top of the
+# cached good-machine words and re-evaluate only the gates whose fanins differ
+# from the good machine, in level order, until the difference dies out. Nodes
+# are IDs (see fault_site) and good_values holds the good-machine word of
+# every node by ID (IndexedNetlist.simulate_packed); increasing ID is an
+# evaluation order, so the event queue is a heap of gate IDs.
+# Returns a word with bit k set when pattern k detects the fault.
+def propagate_fault(compiled, good_values, mask, fault_node, fault_value, branch_gate=None):
+    netlist = compiled.netlist
+    sweep = netlist.sweep
+    offset = netlist.num_inputs
+    fanout_lists = netlist.fanout_lists
+    is_output = netlist.is_output
+    stats = simstats.active
+
+    faulty_word = mask if fault_value else 0
+    if good_values[fault_node] == faulty_word:
+        return 0  # Fault is not excited by any pattern in the batch
+
+    if branch_gate is not None:
+        # A branch fault only changes the one gate pin; start from that gate
+        _, kind, fanins = sweep[branch_gate - offset]
+        pin_words = [faulty_word if inp == fault_node else good_values[inp] for inp in fanins]
+        faulty_word = evaluate_gate_packed(kind, pin_words, mask)
+        if stats is not None:
+            stats.gate_evals[kind] += 1
+        if faulty_word == good_values[branch_gate]:
+            return 0
+        fault_node = branch_gate
+
+    faulty_values = {fault_node: faulty_word}
+    detected = (faulty_word ^ good_values[fault_node]) if is_output[fault_node] else 0
+
+    events = list(set(fanout_lists[fault_node]))
+    heapq.heapify(events)
+    queued = set(events)
+    while events:
+        gate = heapq.heappop(events)
+        _, kind, fanins = sweep[gate - offset]
+        word = evaluate_gate_packed(kind, [faulty_values.get(inp, good_values[inp]) for inp in fanins], mask)
+        if stats is not None:
+            stats.events += 1
+            stats.gate_evals[kind] += 1
+        if word == good_values[gate]:
+            continue  # Difference masked at this gate
+
+        faulty_values[gate] = word
+        if is_output[gate]:
+            detected |= word ^ good_values[gate]
+        for fanout in fanout_lists[gate]:
+            if fanout not in queued:
+                queued.add(fanout)
+                heapq.heappush(events, fanout)
+
+    return detected
+
+
+# PPSFP fault simulation: one good-machine pass per batch of packed vectors,
+# then cone-only propagation per fault. Detected faults are dropped from later
+# batches. Returns (detected, undetected) in fault_list order.
+# propagate takes the arguments of propagate_fault and returns a nonzero word
+# for a detected fault; engine labels the batches in simstats.
+def ppsfp_fault_simulation(compiled, fault_list, test_vectors, batch_size=PATTERNS_PER_BATCH,
+                           propagate=propagate_fault, engine='ppsfp'):
+    remaining = [(fault, fault_site(compiled, fault)) for fault in fault_list]
+    detected_faults = set()
+    stats = simstats.active
+
+    for start in range(0, len(test_vectors), batch_size):
+        with simstats.phase('good_sim'):
+            words, mask = pack_vectors(test_vectors[start:start + batch_size], len(compiled.inputs))
+            good_values = compiled.netlist.simulate_packed(words, mask)
+
+        still_undetected = []
+        with simstats.phase('fault_propagation'):
+            for entry in remaining:
+                fault, (fault_node, fault_value, branch_gate) = entry
+                if propagate(compiled, good_values, mask, fault_node, fault_value, branch_gate):
+                    detected_faults.add(fault)
+                else:
+                    still_undetected.append(entry)
+        if stats is not None:
+            stats.count_sweep(compiled)
+            stats.record_batch(engine, len(test_vectors[start:start + batch_size]),
+                               len(remaining) - len(still_undetected), len(still_undetected))
+        remaining = still_undetected
+
+    return ([f for f in fault_list if f in detected_faults],
+            [f for f in fault_list if f not in detected_faults])
+
+
+# Vector x fault detection bitmap: PPSFP without fault dropping, so every
+# pattern of every batch is checked. Returns {fault: int} with bit k set when
+# test_vectors[k] detects the fault.
+def detection_bitmap(compiled, fault_list, test_vectors, batch_size=PATTERNS_PER_BATCH):
+    parsed = [(fault, fault_site(compiled, fault)) for fault in fault_list]
+    detects = {fault: 0 for fault in fault_list}
+
+    for start in range(0, len(test_vectors), batch_size):
+        words, mask = pack_vectors(test_vectors[start:start + batch_size], len(compiled.inputs))
+        good_values = compiled.netlist.simulate_packed(words, mask)
+        for fault, (fault_node, fault_value, branch_gate) in parsed:
+            word = propagate_fault(compiled, good_values, mask, fault_node, fault_value, branch_gate)
+            if word:
+                detects[fault] |= word << start
+
+    return detects
+
+
+# Static test-set compaction. Reverse-order fault simulation first drops every
+# vector that detects nothing the later vectors have not already detected;
+# a greedy set cover over the survivors (most newly covered faults first)
+# then picks a cover, and a last pass drops any picked vector whose faults the
+# other picks all detect. Coverage is unchanged. Returns (compacted vectors in
+# their original order, detected faults in fault_list order).
+def compact_test_set(compiled, fault_list, test_vectors, batch_size=PATTERNS_PER_BATCH):
+    detects = detection_bitmap(compiled, fault_list, test_vectors, batch_size)
+
+    # Transpose to one fault bitmask per vector
+    vector_faults = [0] * len(test_vectors)
+    for index, fault in enumerate(fault_list):
+        bits = detects[fault]
+        while bits:
+            low = bits & -bits
+            vector_faults[low.bit_length() - 1] |= 1 << index
+            bits ^= low
+
+    covered = 0
+    survivors = []
+    for k in reversed(range(len(test_vectors))):
+        if vector_faults[k] & ~covered:
+            survivors.append(k)
+            covered |= vector_faults[k]
+
+    uncovered = covered
+    chosen = []
+    while uncovered:
+        best = max(survivors, key=lambda k: bin(vector_faults[k] & uncovered).count('1'))
+        chosen.append(best)
+        uncovered &= ~vector_faults[best]
+
+    for k in reversed(chosen[:]):
+        others = 0
+        for other in chosen:
+            if other != k:
+                others |= vector_faults[other]
+        if vector_faults[k] & ~others == 0:
+            chosen.remove(k)
+
+    if len(chosen) > len(survivors):
+        chosen = survivors
+    return ([test_vectors[k] for k in sorted(chosen)],
+            [fault for fault in fault_list if detects[fault]])
+
+
+# Deductive fault propagation for one vector: given the good value of every
+# node (a list by ID, see IndexedNetlist.simulate), compute the set of faults
+# (restricted to fault_set) that flip each node, using the controlling-value
+# set rules per gate kind. Returns the union of the lists reaching the primary
+# outputs.
+def deduce_detected_faults(compiled, node_values, fault_set):
+    netlist = compiled.netlist
+    names = netlist.names
+    fault_lists = [None] * len(names)
+
+    for node in range(netlist.num_inputs):
+        own_fault = f"{names[node]}-sa-{1 - node_values[node]}"
+        fault_lists[node] = {own_fault} if own_fault in fault_set else set()
+
+    for gate, kind, fanins in netlist.sweep:
+        # Faults flipping each input pin: the driver's list plus the branch fault
+        input_lists = []
+        for inp in fanins:
+            branch_fault = f"{names[gate]}.{names[inp]}-sa-{1 - node_values[inp]}"
+            if branch_fault in fault_set:
+                input_lists.append(fault_lists[inp] | {branch_fault})
+            else:
+                input_lists.append(fault_lists[inp])
+
+        if kind in ('AND', 'NAND', 'OR', 'NOR'):
+            controlling = 0 if kind in ('AND', 'NAND') else 1
+            at_controlling = [input_list for inp, input_list in zip(fanins, input_lists)
+                              if node_values[inp] == controlling]
+            if not at_controlling:
+                # No controlling input: any single input flip propagates
+                faults = set().union(*input_lists)
+            else:
+                # Output flips only if every controlling input flips and no other input does
+                faults = set.intersection(*at_controlling)
+                for inp, input_list in zip(fanins, input_lists):
+                    if node_values[inp] != controlling:
+                        faults -= input_list
+        elif kind == 'XOR' or kind == 'XNOR':
+            # Output flips when an odd number of inputs flip
+            faults = set()
+            for input_list in input_lists:
+                faults ^= input_list
+        else:
+            faults = set(input_lists[0])  # NOT and BUFFER
+
+        own_fault = f"{names[gate]}-sa-{1 - node_values[gate]}"
+        if own_fault in fault_set:
+            faults.add(own_fault)
+        fault_lists[gate] = faults
+
+    return set().union(*(fault_lists[output] for output in netlist.output_ids))
+
+
+# Deductive fault simulation: one good-machine pass per vector yields every
+# fault that vector detects. Detected faults are dropped from later vectors.
+# Returns (detected, undetected) in fault_list order.
+def deductive_fault_simulation(compiled, fault_list, test_vectors):
+    remaining = set(fault_list)
+    detected_faults = set()
+    stats = simstats.active
+
+    for test_vector in test_vectors:
+        if not remaining:
+            break
+        with simstats.phase('good_sim'):
+            node_values = compiled.netlist.simulate(test_vector)
+        with simstats.phase('fault_propagation'):
+            newly_detected = deduce_detected_faults(compiled, node_values, remaining)
+        detected_faults |= newly_detected
+        remaining -= newly_detected
+        if stats is not None:
+            stats.count_sweep(compiled)
+            stats.record_batch('deductive', 1, len(newly_detected), len(remaining))
+
+    return ([f for f in fault_list if f in detected_faults],
+            [f for f in fault_list if f not in detected_faults])
+
+
+# Concurrent fault simulation. For every node the simulator keeps the good
+# value plus the faulty machines whose value at that node differs from it.
+# Between vectors only gates whose fanin good value or fanin fault list changed
+# are re-evaluated, so the work per vector follows fault activity rather than
+# faults x gates. Detected faults are dropped as soon as they reach an output.
+# All per-node state is kept in lists by node ID.
+class ConcurrentFaultSimulator:
+    def __init__(self, compiled, fault_list):
+        self.compiled = compiled
+        self.fault_list = list(fault_list)
+        self.detected = set()
+
+        # Stem faults located at each node ID, as (fault, stuck value) pairs,
+        # and branch faults on the input pins of each gate ID, as (fault, pin
+        # ID, value)
+        self.site_faults = {}
+        self.branch_faults = {}
+        for fault in self.fault_list:
+            node, value, branch_gate = fault_site(compiled, fault)
+            if branch_gate is None:
+                self.site_faults.setdefault(node, []).append((fault, value))
+            else:
+                self.branch_faults.setdefault(branch_gate, []).append((fault, node, value))
+
+        node_count = len(compiled.netlist.names)
+        self.good = [None] * node_count
+        self.diverged = [None] * node_count  # {fault: faulty value} for differing machines
+
+    # Site faults of node that differ from its good value
+    def _own_divergence(self, node, good_value):
+        return {fault: value for fault, value in self.site_faults.get(node, ())
+                if value != good_value and fault not in self.detected}
+
+    # Apply one vector and return the faults it newly detects
+    def apply(self, test_vector):
+        netlist = self.compiled.netlist
+        sweep = netlist.sweep
+        offset = netlist.num_inputs
+        fanout_lists = netlist.fanout_lists
+        good = self.good
+        diverged = self.diverged
+        detected = self.detected
+        stats = simstats.active
+
+        events = []
+        queued = set()
+
+        def schedule_fanouts(node):
+            for fanout in fanout_lists[node]:
+                if fanout not in queued:
+                    queued.add(fanout)
+                    heapq.heappush(events, fanout)
+
+        for node, value in enumerate(test_vector):
+            if good[node] == value and diverged[node] is not None:
+                continue
+            good[node] = value
+            diverged[node] = self._own_divergence(node, value)
+            schedule_fanouts(node)
+
+        newly_detected = set()
+        while events:
+            gate = heapq.heappop(events)
+            _, kind, fanins = sweep[gate - offset]
+            good_value = evaluate_gate(kind, [good[inp] for inp in fanins])
+
+            # Faulty machines that may differ here: those differing on a fanin
+            candidates = set()
+            for inp in fanins:
+                candidates.update(diverged[inp])
+
+            gate_diverged = self._own_divergence(gate, good_value)
+            evaluations = 1
+            for fault, pin, value in self.branch_faults.get(gate, ()):
+                if fault not in detected and good[pin] != value:
+                    faulty_value = evaluate_gate(kind, [value if inp == pin else good[inp] for inp in fanins])
+                    evaluations += 1
+                    if faulty_value != good_value:
+                        gate_diverged[fault] = faulty_value
+            for fault in candidates:
+                if fault in detected:
+                    continue
+                value = evaluate_gate(kind, [diverged[inp].get(fault, good[inp]) for inp in fanins])
+                evaluations += 1
+                if value != good_value:
+                    gate_diverged[fault] = value
+            if stats is not None:
+                stats.events += 1
+                stats.gate_evals[kind] += evaluations
+
+            if good_value != good[gate] or gate_diverged != diverged[gate]:
+                good[gate] = good_value
+                diverged[gate] = gate_diverged
+                schedule_fanouts(gate)
+
+        for output in netlist.output_ids:
+            for fault in diverged[output] or ():
+                if fault not in detected:
+                    newly_detected.add(fault)
+        detected |= newly_detected
+        return newly_detected
+
+
+# Concurrent fault simulation over a vector list. Returns (detected,
+# undetected) in fault_list order.
+def concurrent_fault_simulation(compiled, fault_list, test_vectors):
+    simulator = ConcurrentFaultSimulator(compiled, fault_list)
+    stats = simstats.active
+    for test_vector in test_vectors:
+        if len(simulator.detected) == len(simulator.fault_list):
+            break
+        # Good and faulty machines are evaluated together, so it is all one phase
+        with simstats.phase('fault_propagation'):
+            newly_detected = simulator.apply(test_vector)
+        if stats is not None:
+            stats.record_batch('concurrent', 1, len(newly_detected),
+                               len(simulator.fault_list) - len(simulator.detected))
+
+    return ([f for f in fault_list if f in simulator.detected],
+            [f for f in fault_list if f not in simulator.detected])
+
+
+# Number of distinct lines node (an ID) drives: one per gate pin it feeds,
+# plus one if it is also observed at a primary output
+def fanout_count(compiled, node):
+    netlist = compiled.netlist
+    return len(netlist.fanout_lists[node]) + netlist.is_output[node]
+
+
+# Full fault list including fanout branches: stem faults on every node plus
+# "gate.input" branch faults on every gate pin whose driver has fanout > 1
+def generate_fault_universe(compiled):
+    names = compiled.netlist.names
+    fault_list = [f"{node}-sa-{value}" for node in names for value in (0, 1)]
+    for gate, _, fanins in compiled.netlist.sweep:
+        for inp in dict.fromkeys(fanins):  # A line tied to two pins is one branch
+            if fanout_count(compiled, inp) > 1:
+                fault_list.extend(f"{names[gate]}.{names[inp]}-sa-{value}" for value in (0, 1))
+    return fault_list
+
+
+# Structural fault collapsing. Faults are merged into equivalence classes with
+# the per-gate rules (an input stuck at the controlling value is equivalent to
+# the output stuck at the controlled value, NOT/BUFFER pass both polarities
+# through), then, if dominance is set, the class of a gate output fault that
+# dominates an input fault (AND/NAND/OR/NOR, input stuck at the
+# non-controlling value) is dropped. A gate pin is the stem itself when its
+# driver has no other fanout, otherwise it is a separate branch fault; faults
+# absent from fault_list never take part.
+#
+# Returns (collapsed_list, fault_map): the representatives to simulate, in
+# fault_list order, and for every fault in fault_list the representative whose
+# detection implies it (exact for equivalence; for a dominance-dropped fault the
+# representative is the dominated fault, so full-list coverage is a lower bound).
+def collapse_faults(compiled, fault_list, dominance=True):
+    names = compiled.netlist.names
+    ids = compiled.netlist.ids
+    fault_set = set(fault_list)
+    parent = {fault: fault for fault in fault_list}
+
+    def find(fault):
+        while parent[fault] != fault:
+            parent[fault] = parent[parent[fault]]
+            fault = parent[fault]
+        return fault
+
+    def union(a, b):
+        if a in fault_set and b in fault_set:
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[root_b] = root_a
+
+    # Fault on the line feeding pin inp of gate (both IDs)
+    def pin_fault(gate, inp, value):
+        if fanout_count(compiled, inp) > 1:
+            return f"{names[gate]}.{names[inp]}-sa-{value}"
+        return f"{names[inp]}-sa-{value}"
+
+    # Pin faults written out for fanout-free lines are the stem faults themselves
+    for fault in fault_list:
+        node, value, branch_gate = parse_fault(fault)
+        if branch_gate is not None and fanout_count(compiled, ids[node]) <= 1:
+            union(f"{node}-sa-{value}", fault)
+
+    dominance_pairs = []
+    for gate, kind, fanins in compiled.netlist.sweep:
+        name = names[gate]
+        if kind in ('AND', 'NAND', 'OR', 'NOR'):
+            controlling = 0 if kind in ('AND', 'NAND') else 1
+            inverting = 1 if kind in ('NAND', 'NOR') else 0
+            for inp in fanins:
+                union(f"{name}-sa-{controlling ^ inverting}", pin_fault(gate, inp, controlling))
+                dominance_pairs.append((f"{name}-sa-{(1 - controlling) ^ inverting}",
+                                        pin_fault(gate, inp, 1 - controlling)))
+        elif kind == 'XOR' or kind == 'XNOR':
+            continue  # No structural equivalences through XOR/XNOR
+        else:
+            inverting = 1 if kind == 'NOT' else 0  # NOT and BUFFER
+            for value in (0, 1):
+                union(f"{name}-sa-{value ^ inverting}", pin_fault(gate, fanins[0], value))
+
+    # Class representative: first member in fault_list order
+    representative = {}
+    for fault in fault_list:
+        representative.setdefault(find(fault), fault)
+
+    dropped = {}
+    if dominance:
+        for dominating, dominated in dominance_pairs:
+            if dominating in fault_set and dominated in fault_set:
+                root_out, root_in = find(dominating), find(dominated)
+                if root_out != root_in:
+                    dropped.setdefault(root_out, root_in)
+
+    # Follow dominance drops until reaching a class that is kept
+    def implied_by(root):
+        seen = set()
+        while root in dropped and root not in seen:
+            seen.add(root)
+            root = dropped[root]
+        return root
+
+    fault_map = {fault: representative[implied_by(find(fault))] for fault in fault_list}
+    collapsed_list = [fault for fault in fault_list if fault_map[fault] == fault]
+    return collapsed_list, fault_map
+
+
+# Expand faults detected on the collapsed list back to the full fault list
+def expand_detected(detected_faults, fault_map):
+    detected_faults = set(detected_faults)
+    return [fault for fault, rep in fault_map.items() if rep in detected_faults]
+
+
+# Fault simulation engines that take (compiled, fault_list, test_vectors)
+ENGINES = {
+    'ppsfp': ppsfp_fault_simulation,
+    'deductive': deductive_fault_simulation,
+    'concurrent': concurrent_fault_simulation,
+}
+
+# Per-process state of the sharded workers; the compiled circuit is handed to
+# each worker once through the pool initializer (inherited as-is under fork)
+_worker_state = {}
+
+
+def _init_shard_worker(compiled, engine):
+    _worker_state['compiled'] = compiled
+    _worker_state['engine'] = ENGINES[engine]
+
+
+def _simulate_shard(args):
+    fault_shard, test_vectors = args
+    detected, _ = _worker_state['engine'](_worker_state['compiled'], fault_shard, test_vectors)
+    return detected
+
+
+# Process pool for sharded fault simulation of one compiled circuit with one
+# engine. The pool is started once and reused by every simulate call (e.g. for
+# each increment of an incremental run); close it, or use it as a context
+# manager. workers=None uses every CPU; workers=1 runs in-process.
+class ShardedFaultSimulator:
+    def __init__(self, compiled, workers=None, engine='ppsfp', shards_per_worker=4):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.compiled = compiled
+        self.workers = workers
+        self.engine = engine
+        self.shards_per_worker = shards_per_worker
+        self.pool = None
+        if workers > 1:
+            self.pool = multiprocessing.Pool(workers, initializer=_init_shard_worker, initargs=(compiled, engine))
+
+    # Split the fault list into shards, simulate them on the pool and merge the
+    # results. Returns (detected, undetected) in fault_list order.
+    def simulate(self, fault_list, test_vectors):
+        if self.pool is None or len(fault_list) < 2:
+            return ENGINES[self.engine](self.compiled, fault_list, test_vectors)
+
+        # Interleaved shards so each one gets a mix of easy and hard faults
+        shard_count = min(len(fault_list), self.workers * self.shards_per_worker)
+        shards = [fault_list[i::shard_count] for i in range(shard_count)]
+
+        detected_faults = set()
+        for detected in self.pool.imap_unordered(_simulate_shard, [(shard, test_vectors) for shard in shards]):
+            detected_faults.update(detected)
+
+        return ([f for f in fault_list if f in detected_faults],
+                [f for f in fault_list if f not in detected_faults])
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# One-off sharded run: a pool for this call only (see ShardedFaultSimulator)
+def sharded_fault_simulation(compiled, fault_list, test_vectors, workers=None, engine='ppsfp', shards_per_worker=4):
+    with ShardedFaultSimulator(compiled, workers, engine, shards_per_worker) as simulator:
+        return simulator.simulate(fault_list, test_vectors)
@@ -0,0 +1,627 @@
+import hashlib
+import json
+import mmap
+import os
+import simstats
+from array import array
+from collections import ChainMap, OrderedDict
+
+# Shared netlist model for the project scripts. The circuit is parsed once,
+# levelized once, and every simulator walks the resulting schedule in a single
+# linear sweep instead of rescanning the gate dictionary until it settles.
+
+
+# Parse the .bench file to extract inputs, outputs, and gate connections
+def parse_bench_file(file_path):
+    with open(file_path, 'r') as file:
+        return parse_bench_text(file.read())
+
+
+# Single pass over the .bench text using plain string operations (no per-line
+# regex). Gate lines, by far the most common, are handled first.
+def parse_bench_text(text):
+    inputs, outputs, gates = [], [], {}
+
+    with simstats.phase('parse'):
+        for line in text.split('\n'):
+            if '=' in line:
+                output, _, expression = line.partition('=')
+                gate_type, paren, args = expression.partition('(')
+                if not paren or output.lstrip()[:1] == '#':
+                    continue
+                args = args[:args.rfind(')')].replace(' ', '').replace('\t', '')
+                gates[output.strip()] = {'type': gate_type.strip(), 'inputs': args.split(',')}
+            else:
+                line = line.strip()
+                if line.startswith('INPUT'):
+                    inputs.append(line[line.index('(') + 1:line.index(')')].strip())
+                elif line.startswith('OUTPUT'):
+                    outputs.append(line[line.index('(') + 1:line.index(')')].strip())
+
+    return inputs, outputs, gates
+
+
+# Evaluate logic gate based on its type and input values
+def evaluate_gate(gate_type, input_values):
+    if gate_type == 'AND':
+        return int(all(input_values))
+    elif gate_type == 'NAND':
+        return int(not all(input_values))
+    elif gate_type == 'OR':
+        return int(any(input_values))
+    elif gate_type == 'NOR':
+        return int(not any(input_values))
+    elif gate_type == 'XOR':
+        return int(sum(input_values) % 2 == 1)
+    elif gate_type == 'XNOR':
+        return int(sum(input_values) % 2 == 0)
+    elif gate_type == 'NOT':
+        return int(not input_values[0])
+    elif gate_type == 'BUFFER' or gate_type == 'BUFF':
+        return input_values[0]
+    return input_values[0]  # Default behavior
+
+
+# Bit-parallel version of evaluate_gate: bit k of every word holds the value
+# for pattern k, so one call evaluates the gate for a whole batch of patterns.
+# mask has a 1 in every pattern position and is used for the inversions.
+def evaluate_gate_packed(gate_type, input_words, mask):
+    if gate_type == 'AND' or gate_type == 'NAND':
+        word = mask
+        for w in input_words:
+            word &= w
+        return word ^ mask if gate_type == 'NAND' else word
+    elif gate_type == 'OR' or gate_type == 'NOR':
+        word = 0
+        for w in input_words:
+            word |= w
+        return word ^ mask if gate_type == 'NOR' else word
+    elif gate_type == 'XOR' or gate_type == 'XNOR':
+        word = 0
+        for w in input_words:
+            word ^= w
+        return word ^ mask if gate_type == 'XNOR' else word
+    elif gate_type == 'NOT':
+        return input_words[0] ^ mask
+    return input_words[0]  # BUFFER and default behavior
+
+
+# Pack test vectors into one word per primary input (bit k = vector k).
+# Returns the input words and the mask covering the packed patterns.
+def pack_vectors(test_vectors, input_count):
+    words = [0] * input_count
+    for k, vector in enumerate(test_vectors):
+        bit = 1 << k
+        for i, value in enumerate(vector):
+            if value:
+                words[i] |= bit
+    return words, (1 << len(test_vectors)) - 1
+
+
+# Assign every node its logic level (inputs are level 0, a gate sits one level
+# above its deepest fanin). Kahn's algorithm, so the cost is linear in the
+# number of gate pins.
+def levelize(inputs, gates):
+    levels = {node: 0 for node in inputs}
+    pending = {}
+    fanouts = {}
+
+    for gate, info in gates.items():
+        if gate in levels:
+            continue  # Already driven by a primary input
+        pending[gate] = len(info['inputs'])
+        for inp in info['inputs']:
+            if inp not in levels and inp not in gates:
+                raise ValueError(f"Gate {gate} reads undriven node {inp}")
+            fanouts.setdefault(inp, []).append(gate)
+
+    ready = list(inputs)
+    while ready:
+        node = ready.pop()
+        for gate in fanouts.get(node, ()):
+            level = levels[node] + 1
+            if level > levels.get(gate, 0):
+                levels[gate] = level
+            pending[gate] -= 1
+            if pending[gate] == 0:
+                ready.append(gate)
+
+    unresolved = [gate for gate, count in pending.items() if count > 0]
+    if unresolved:
+        raise ValueError(f"Combinational loop through {len(unresolved)} gates (e.g. {unresolved[0]})")
+
+    return levels
+
+
+# Gate types with their own evaluation rule; every other type (DFF, ...)
+# evaluates as a buffer, like evaluate_gate
+EVALUATED_TYPES = ('AND', 'NAND', 'OR', 'NOR', 'XOR', 'XNOR', 'NOT', 'BUFFER')
+
+# Other .bench spellings of the evaluated types
+GATE_ALIASES = {'BUFF': 'BUFFER'}
+
+
+# Evaluation kind of a gate type (in any case): one of EVALUATED_TYPES
+def gate_kind(gate_type):
+    kind = gate_type.upper()
+    kind = GATE_ALIASES.get(kind, kind)
+    return kind if kind in EVALUATED_TYPES else 'BUFFER'
+
+
+# Compact, integer-indexed netlist. Node IDs put the primary inputs first and
+# then the gates in levelized order, so increasing ID is a valid evaluation
+# order. Per node it keeps an opcode (index into type_names, 0 for inputs) and
+# its level; fanins and fanouts are CSR arrays (the fanins of node i are
+# fanin[fanin_start[i]:fanin_start[i + 1]]). Names are only needed at the I/O
+# boundary through names/ids. A sequential circuit is stored as its
+# combinational core: the Q outputs of its num_flip_flops flip-flops are the
+# last inputs and their D inputs the last outputs.
+class IndexedNetlist:
+    def __init__(self, names, num_inputs, type_names, opcodes, levels, fanin_start, fanin, output_ids,
+                 fanout_start=None, fanout=None, num_flip_flops=0):
+        self.names = names
+        self.num_inputs = num_inputs
+        self.type_names = type_names
+        self.opcodes = opcodes
+        self.levels = levels
+        self.fanin_start = fanin_start
+        self.fanin = fanin
+        self.output_ids = output_ids
+        self.num_flip_flops = num_flip_flops
+
+        # Fanout CSR built by counting sort over the fanin array, unless given
+        # (the on-disk cache stores it)
+        if fanout_start is None:
+            counts = [0] * (len(names) + 1)
+            for node in fanin:
+                counts[node + 1] += 1
+            for i in range(len(names)):
+                counts[i + 1] += counts[i]
+            fanout_start = array('l', counts)
+            fanout = array('l', bytes(array('l').itemsize * len(fanin)))
+            fill = counts[:-1]
+            for gate in range(num_inputs, len(names)):
+                for k in range(fanin_start[gate], fanin_start[gate + 1]):
+                    node = fanin[k]
+                    fanout[fill[node]] = gate
+                    fill[node] += 1
+        self.fanout_start = fanout_start
+        self.fanout = fanout
+
+        # Evaluation kind per opcode
+        self.kinds = [gate_kind(t) for t in type_names]
+
+        # Lookups derived from the arrays (see the properties below) are built
+        # on first use, so a netlist mapped from the cache is ready at once
+        self._ids = None
+        self._sweep = None
+        self._fanout_lists = None
+        self._is_output = None
+
+        # Generated straight-line sweep (see compile_sweep); None until compiled
+        self.sweep_function = None
+
+    # Node ID by name
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = {name: i for i, name in enumerate(self.names)}
+        return self._ids
+
+    # Flattened (gate, kind, fanin IDs) per gate in ID order, used by simulate
+    @property
+    def sweep(self):
+        if self._sweep is None:
+            kinds, opcodes, fanin, fanin_start = self.kinds, self.opcodes, self.fanin, self.fanin_start
+            self._sweep = [(gate, kinds[opcodes[gate]], tuple(fanin[fanin_start[gate]:fanin_start[gate + 1]]))
+                           for gate in range(self.num_inputs, len(self.names))]
+        return self._sweep
+
+    # Per-node fanout tuples for the event-driven engines
+    @property
+    def fanout_lists(self):
+        if self._fanout_lists is None:
+            fanout, fanout_start = self.fanout, self.fanout_start
+            self._fanout_lists = [tuple(fanout[fanout_start[i]:fanout_start[i + 1]]) for i in range(len(self.names))]
+        return self._fanout_lists
+
+    # Per-node primary-output flags
+    @property
+    def is_output(self):
+        if self._is_output is None:
+            self._is_output = bytearray(len(self.names))
+            for node in self.output_ids:
+                self._is_output[node] = 1
+        return self._is_output
+
+    @classmethod
+    def from_schedule(cls, inputs, outputs, schedule, levels, num_flip_flops=0):
+        names = list(inputs) + [gate for gate, _, _ in schedule]
+        ids = {name: i for i, name in enumerate(names)}
+        type_names = ['INPUT']
+        type_ids = {'INPUT': 0}
+        opcodes = array('B', bytes(len(inputs)))
+        fanin_start = array('l', [0] * (len(inputs) + 1))
+        fanin = array('l')
+        for gate, gate_type, gate_inputs in schedule:
+            if gate_type not in type_ids:
+                type_ids[gate_type] = len(type_names)
+                type_names.append(gate_type)
+            opcodes.append(type_ids[gate_type])
+            fanin.extend(ids[inp] for inp in gate_inputs)
+            fanin_start.append(len(fanin))
+        return cls(names, len(inputs), type_names, opcodes, array('l', (levels[name] for name in names)),
+                   fanin_start, fanin, array('l', (ids[output] for output in outputs)), num_flip_flops=num_flip_flops)
+
+    # Rebuild the (inputs, outputs, gates) structures of parse_bench_file
+    def to_circuit(self):
+        names = self.names
+        inputs = names[:self.num_inputs]
+        outputs = [names[i] for i in self.output_ids]
+        gates = {}
+        for gate in range(self.num_inputs, len(names)):
+            fanins = self.fanin[self.fanin_start[gate]:self.fanin_start[gate + 1]]
+            gates[names[gate]] = {'type': self.type_names[self.opcodes[gate]], 'inputs': [names[i] for i in fanins]}
+        return inputs, outputs, gates
+
+    # Pickled (e.g. for a process pool) with memory-mapped sections copied into
+    # arrays and without the generated sweep, which is compiled again on load
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        for section in CACHE_SECTIONS:
+            if isinstance(state[section], memoryview):
+                state[section] = array(state[section].format, state[section])
+        state['sweep_function'] = self.sweep_function is not None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.sweep_function = None
+        if state['sweep_function']:
+            self.compile_sweep()
+
+    # Python source of a straight-line sweep: one bitwise assignment per gate on
+    # local variables (v<ID>), in ID order, returning the values of all nodes.
+    # It works on packed words; with mask = 1 it evaluates a single 0/1 vector.
+    def generate_sweep_source(self, function_name='sweep'):
+        lines = [f"def {function_name}(inputs, mask):"]
+        if self.num_inputs:
+            lines.append(f"    {', '.join(f'v{i}' for i in range(self.num_inputs))}, = inputs")
+        for gate, kind, fanins in self.sweep:
+            operands = [f"v{i}" for i in fanins]
+            if kind == 'AND' or kind == 'NAND':
+                expression = ' & '.join(operands)
+            elif kind == 'OR' or kind == 'NOR':
+                expression = ' | '.join(operands)
+            elif kind == 'XOR' or kind == 'XNOR':
+                expression = ' ^ '.join(operands)
+            else:
+                expression = operands[0]  # NOT, BUFFER and default behavior
+            if kind == 'NAND' or kind == 'NOR' or kind == 'XNOR' or kind == 'NOT':
+                expression = f"({expression}) ^ mask"
+            lines.append(f"    v{gate} = {expression}")
+        lines.append(f"    return [{', '.join(f'v{i}' for i in range(len(self.names)))}]")
+        return '\n'.join(lines) + '\n'
+
+    # Compile the generated sweep once; afterwards simulate and simulate_packed
+    # call it instead of interpreting the gate types
+    def compile_sweep(self):
+        if self.sweep_function is None:
+            namespace = {}
+            exec(compile(self.generate_sweep_source(), '<netlist sweep>', 'exec'), namespace)
+            self.sweep_function = namespace['sweep']
+        return self.sweep_function
+
+    # Good-machine sweep over node IDs; returns the value of every node by ID
+    def simulate(self, input_vector):
+        if self.sweep_function is not None:
+            return self.sweep_function(input_vector, 1)
+        values = list(input_vector) + [0] * (len(self.names) - self.num_inputs)
+        for gate, kind, fanins in self.sweep:
+            values[gate] = evaluate_gate(kind, [values[i] for i in fanins])
+        return values
+
+    # Bit-parallel sweep (see pack_vectors); returns the word of every node by ID
+    def simulate_packed(self, input_words, mask):
+        if self.sweep_function is not None:
+            return self.sweep_function(input_words, mask)
+        values = list(input_words) + [0] * (len(self.names) - self.num_inputs)
+        for gate, kind, fanins in self.sweep:
+            values[gate] = evaluate_gate_packed(kind, [values[i] for i in fanins], mask)
+        return values
+
+
+# Read-only view of name-keyed node values indexed by node ID, so the
+# name-boundary simulate calls can hand their good values to evaluate_cone
+class _ValuesById:
+    __slots__ = ('values', 'names')
+
+    def __init__(self, values, names):
+        self.values = values
+        self.names = names
+
+    def __getitem__(self, node):
+        return self.values[self.names[node]]
+
+
+# Levelized circuit for the simulators. Everything the engines walk lives on
+# the integer netlist and is addressed by node ID; names are only used at the
+# I/O boundary (inputs, outputs, simulate) and by the name-keyed views the
+# project scripts use (gates, order, schedule), which are built on first use.
+# Every DFF is cut: its Q output becomes a pseudo-primary input after the
+# primary inputs and its D input a pseudo-primary output after the primary
+# outputs (flip_flops lists the (Q, D) pairs), so sequential benches compile
+# to their combinational core.
+# codegen=True compiles the good-machine sweep into straight-line Python (see
+# IndexedNetlist.compile_sweep); worth it when the circuit is simulated often.
+class CompiledCircuit:
+    def __init__(self, inputs, outputs, gates, codegen=False):
+        flip_flops = [(q, info['inputs'][0]) for q, info in gates.items() if info['type'] == 'DFF']
+        if flip_flops:
+            inputs = list(inputs) + [q for q, _ in flip_flops]
+            outputs = list(outputs) + [d for _, d in flip_flops]
+            gates = {gate: info for gate, info in gates.items() if info['type'] != 'DFF'}
+
+        with simstats.phase('levelize'):
+            levels = levelize(inputs, gates)
+
+            # Gates sorted by level; every fanin is evaluated before its fanout
+            input_set = set(inputs)
+            order = sorted((g for g in gates if g not in input_set), key=levels.__getitem__)
+            schedule = [(gate, gates[gate]['type'], tuple(gates[gate]['inputs'])) for gate in order]
+            netlist = IndexedNetlist.from_schedule(inputs, outputs, schedule, levels, len(flip_flops))
+        self._setup(netlist, codegen)
+        self._gates = gates
+        self._schedule = schedule
+
+    # Wrap an already levelized integer netlist (e.g. one loaded from the
+    # on-disk cache) without levelizing again
+    @classmethod
+    def from_netlist(cls, netlist, codegen=False):
+        compiled = cls.__new__(cls)
+        compiled._setup(netlist, codegen)
+        return compiled
+
+    def _setup(self, netlist, codegen):
+        self.netlist = netlist
+        self.inputs = netlist.names[:netlist.num_inputs]
+        self.outputs = [netlist.names[i] for i in netlist.output_ids]
+        count = netlist.num_flip_flops
+        self.flip_flops = list(zip(self.inputs[len(self.inputs) - count:], self.outputs[len(self.outputs) - count:]))
+        self.depth = max(netlist.levels, default=0)
+        if codegen:
+            netlist.compile_sweep()
+        self._gates = None
+        self._schedule = None
+
+        # Fanout cones by node ID, built on first use per node
+        self._cone_schedules = {}
+        self._reachable_outputs = {}
+
+    # {gate: {'type', 'inputs'}} as returned by parse_bench_file
+    @property
+    def gates(self):
+        if self._gates is None:
+            self._gates = self.netlist.to_circuit()[2]
+        return self._gates
+
+    # Gate names in evaluation order
+    @property
+    def order(self):
+        return self.netlist.names[self.netlist.num_inputs:]
+
+    # (gate, type, inputs) per gate, by name, in evaluation order
+    @property
+    def schedule(self):
+        if self._schedule is None:
+            netlist = self.netlist
+            names = netlist.names
+            self._schedule = [(names[gate], netlist.type_names[netlist.opcodes[gate]], tuple(names[i] for i in fanins))
+                              for gate, _, fanins in netlist.sweep]
+        return self._schedule
+
+    # Gate IDs in the transitive fanout cone of node (an ID), in ID order,
+    # which is evaluation order. Depth-first walk over the fanout lists.
+    def fanout_cone(self, node):
+        fanout_lists = self.netlist.fanout_lists
+        cone = set()
+        stack = [node]
+        while stack:
+            for fanout in fanout_lists[stack.pop()]:
+                if fanout not in cone:
+                    cone.add(fanout)
+                    stack.append(fanout)
+        return sorted(cone)
+
+    # Sweep entries (gate, kind, fanin IDs) of the gates in node's fanout cone
+    def cone_schedule(self, node):
+        entries = self._cone_schedules.get(node)
+        if entries is None:
+            sweep, offset = self.netlist.sweep, self.netlist.num_inputs
+            entries = self._cone_schedules[node] = [sweep[gate - offset] for gate in self.fanout_cone(node)]
+        return entries
+
+    # IDs of the primary outputs whose value can depend on node
+    def reachable_outputs(self, node):
+        outputs = self._reachable_outputs.get(node)
+        if outputs is None:
+            is_output = self.netlist.is_output
+            outputs = [gate for gate in [node] + self.fanout_cone(node) if is_output[gate]]
+            self._reachable_outputs[node] = outputs
+        return outputs
+
+    # Faulty values of node's fanout cone with node (an ID) forced to
+    # fault_word, on top of the good-machine words of the same batch (a list
+    # by ID, see IndexedNetlist.simulate_packed). Returns {ID: word} for node
+    # and the cone gates only.
+    def evaluate_cone(self, good_values, mask, node, fault_word):
+        faulty_values = {node: fault_word}
+        cone = self.cone_schedule(node)
+        if simstats.active is not None:
+            simstats.active.count_schedule(cone)
+        for gate, kind, fanins in cone:
+            faulty_values[gate] = evaluate_gate_packed(kind, [faulty_values[i] if i in faulty_values else good_values[i]
+                                                              for i in fanins], mask)
+        return faulty_values
+
+    # Single sweep; returns the value of every node by name. fault is an
+    # optional (node, value) stuck-at pair. When the good-machine values for
+    # the same vector are passed in, only the fault's fanout cone is
+    # re-evaluated: the new values go into an overlay dict, returned as a
+    # ChainMap over good_values, so nothing outside the cone is copied.
+    def simulate(self, input_vector, fault=None, good_values=None):
+        if fault is None:
+            return dict(zip(self.netlist.names, self.netlist.simulate(input_vector)))
+        fault_node, fault_value = fault
+        return self._simulate_fault(input_vector, 1, self.netlist.ids[fault_node], fault_value, good_values)
+
+    # Same sweep on packed words (see pack_vectors); a stuck-at fault forces
+    # the node to all-zeros or all-ones across the batch.
+    def simulate_packed(self, input_words, mask, fault=None, good_values=None):
+        if fault is None:
+            return dict(zip(self.netlist.names, self.netlist.simulate_packed(input_words, mask)))
+        fault_node, fault_value = fault
+        return self._simulate_fault(input_words, mask, self.netlist.ids[fault_node], mask if fault_value else 0,
+                                    good_values)
+
+    # Faulty sweep behind simulate/simulate_packed (a single vector is the
+    # one-pattern case, mask 1)
+    def _simulate_fault(self, input_words, mask, fault_node, fault_word, good_values):
+        netlist = self.netlist
+        names = netlist.names
+        if good_values is not None:
+            faulty_values = self.evaluate_cone(_ValuesById(good_values, names), mask, fault_node, fault_word)
+            return ChainMap({names[i]: word for i, word in faulty_values.items()}, good_values)
+
+        values = list(input_words) + [0] * (len(names) - netlist.num_inputs)
+        if fault_node < netlist.num_inputs:
+            values[fault_node] = fault_word
+        for gate, kind, fanins in netlist.sweep:
+            if gate == fault_node:
+                values[gate] = fault_word
+            else:
+                values[gate] = evaluate_gate_packed(kind, [values[i] for i in fanins], mask)
+        return dict(zip(names, values))
+
+
+# Most recently compiled circuits (see compile_circuit); bounded so that a
+# process working through many circuits does not keep all of them alive
+COMPILED_CACHE_SIZE = 4
+_compiled_cache = OrderedDict()
+
+
+# Compile (or fetch the already compiled) schedule for a parsed circuit. The
+# cache is keyed on the identity of the parsed structures so that callers which
+# pass the same (inputs, outputs, gates) triple around only levelize once; the
+# entry holds the triple itself, so an id is never reused while it is cached.
+def compile_circuit(inputs, outputs, gates):
+    key = (id(inputs), id(outputs), id(gates))
+    entry = _compiled_cache.get(key)
+    if entry is not None and entry[0] is inputs and entry[1] is outputs and entry[2] is gates:
+        _compiled_cache.move_to_end(key)
+        return entry[3]
+
+    compiled = CompiledCircuit(inputs, outputs, gates)
+    _compiled_cache[key] = (inputs, outputs, gates, compiled)
+    while len(_compiled_cache) > COMPILED_CACHE_SIZE:
+        _compiled_cache.popitem(last=False)
+    return compiled
+
+
+# On-disk cache of compiled netlists. Each entry holds the levelized
+# IndexedNetlist of one .bench file (for a sequential bench, its DFF-cut core,
+# see CompiledCircuit), keyed on a hash of the file content, as a
+# small JSON header followed by the raw array sections; loading it maps the
+# file and views the sections in place instead of parsing and levelizing.
+CACHE_DIR = '.netlist_cache'
+CACHE_MAGIC = b'NLCACHE2'
+CACHE_SECTIONS = ('opcodes', 'levels', 'fanin_start', 'fanin', 'output_ids', 'fanout_start', 'fanout')
+
+
+def save_netlist_cache(netlist, cache_path):
+    blobs = [('names', '\n'.join(netlist.names).encode('utf-8'), 'B')]
+    for section in CACHE_SECTIONS:
+        values = getattr(netlist, section)
+        if not isinstance(values, array):
+            values = array(values.format, values)
+        blobs.append((section, values.tobytes(), values.typecode))
+
+    sections = {}
+    offset = 0
+    for section, blob, typecode in blobs:
+        sections[section] = [offset, len(blob), typecode]
+        offset += (len(blob) + 7) // 8 * 8
+    header = json.dumps({'num_inputs': netlist.num_inputs, 'num_flip_flops': netlist.num_flip_flops,
+                         'type_names': netlist.type_names, 'sections': sections}).encode('utf-8')
+    header += b' ' * (-(len(CACHE_MAGIC) + 8 + len(header)) % 8)
+
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(CACHE_MAGIC)
+        file.write(len(header).to_bytes(8, 'little'))
+        file.write(header)
+        for _, blob, _ in blobs:
+            file.write(blob)
+            file.write(bytes(-len(blob) % 8))
+    os.replace(temp_path, cache_path)
+
+
+def load_netlist_cache(cache_path):
+    with open(cache_path, 'rb') as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    if bytes(view[:len(CACHE_MAGIC)]) != CACHE_MAGIC:
+        raise ValueError(f"{cache_path} is not a netlist cache file")
+
+    header_length = int.from_bytes(view[len(CACHE_MAGIC):len(CACHE_MAGIC) + 8], 'little')
+    base = len(CACHE_MAGIC) + 8 + header_length
+    header = json.loads(bytes(view[len(CACHE_MAGIC) + 8:base]).decode('utf-8'))
+
+    def section(name):
+        offset, length, typecode = header['sections'][name]
+        return view[base + offset:base + offset + length].cast(typecode)
+
+    names_blob = bytes(section('names')).decode('utf-8')
+    names = names_blob.split('\n') if names_blob else []
+    return IndexedNetlist(names, header['num_inputs'], header['type_names'],
+                          *(section(name) for name in CACHE_SECTIONS), num_flip_flops=header['num_flip_flops'])
+
+
+# Load and compile a .bench file, going through the netlist cache in
+# cache_dir (pass None to always parse)
+def load_circuit(file_path, cache_dir=CACHE_DIR, codegen=False):
+    with open(file_path, 'rb') as file:
+        data = file.read()
+    if cache_dir is None:
+        return CompiledCircuit(*parse_bench_text(data.decode('utf-8')), codegen=codegen)
+
+    digest = hashlib.sha1(data).hexdigest()[:16]
+    cache_path = os.path.join(cache_dir, f"{os.path.basename(file_path)}-{digest}.nlc")
+    if os.path.exists(cache_path):
+        try:
+            return CompiledCircuit.from_netlist(load_netlist_cache(cache_path), codegen)
+        except (OSError, ValueError, KeyError):
+            pass  # Unreadable cache entry: rebuild it below
+
+    compiled = CompiledCircuit(*parse_bench_text(data.decode('utf-8')), codegen=codegen)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        save_netlist_cache(compiled.netlist, cache_path)
+    except OSError:
+        pass  # Caching is best effort (e.g. read-only checkout)
+    return compiled
+
+
+# Compile the Node-object circuits used by the SCOAP and Monte Carlo scripts
+# (nodes maps name -> Node with gate_type and inputs). Flip-flops go through
+# the same DFF cut as load_circuit: Q becomes a pseudo-input, D a pseudo-output.
+def compile_nodes(nodes, outputs=()):
+    inputs = [name for name, node in nodes.items() if node.gate_type is None]
+    gates = {name: {'type': node.gate_type, 'inputs': node.inputs}
+             for name, node in nodes.items() if node.gate_type is not None}
+    return CompiledCircuit(inputs, outputs, gates)
+
+
+# Levelized evaluation order for the Node-object circuits
+def levelized_node_order(nodes):
+    return [nodes[name] for name in compile_nodes(nodes).order]
@@ -0,0 +1,107 @@
+import numpy as np
+
+# Vectorized good-machine simulator over packed uint64 pattern matrices.
+# Node values are stored as a (num_nodes x num_words) uint64 array, bit j of
+# word w holding the value for pattern 64 * w + j. Each level of the compiled
+# netlist is evaluated with one fancy-index gather and one reduction per
+# (gate type, fanin count) group, so the Python overhead is per level, not per
+# pattern or per gate.
+
+class NumpySimulator:
+    def __init__(self, compiled):
+        netlist = compiled.netlist
+        self.compiled = compiled
+        self.inputs = compiled.inputs
+        self.outputs = compiled.outputs
+        self.names = netlist.names
+        self.index = netlist.ids
+        self.output_index = np.asarray(netlist.output_ids).astype(np.intp)
+
+        # One vectorized gather and reduction per (kind, fanin count) group
+        self.level_groups = level_groups(netlist, netlist.kinds)
+
+    # input_words is a (num_inputs x num_words) uint64 array; returns the packed
+    # values of every node in self.names order
+    def simulate_words(self, input_words):
+        input_words = np.asarray(input_words, dtype=np.uint64)
+        values = np.empty((len(self.names), input_words.shape[1]), dtype=np.uint64)
+        values[:len(self.inputs)] = input_words
+
+        for groups in self.level_groups:
+            for gate_type, out_idx, fanin_idx in groups:
+                fanin_words = values[fanin_idx]  # (gates x fanins x words)
+                if gate_type == 'AND' or gate_type == 'NAND':
+                    result = np.bitwise_and.reduce(fanin_words, axis=1)
+                elif gate_type == 'OR' or gate_type == 'NOR':
+                    result = np.bitwise_or.reduce(fanin_words, axis=1)
+                elif gate_type == 'XOR' or gate_type == 'XNOR':
+                    result = np.bitwise_xor.reduce(fanin_words, axis=1)
+                elif gate_type == 'NOT':
+                    result = fanin_words[:, 0]
+                else:
+                    result = fanin_words[:, 0]  # BUFFER and default behavior
+
+                if gate_type in ('NAND', 'NOR', 'XNOR', 'NOT'):
+                    result = np.bitwise_not(result)
+                values[out_idx] = result
+
+        return values
+
+    # Circuit.simulate-style entry point for a list of test vectors; returns
+    # {output: [value per vector]}
+    def simulate(self, test_vectors):
+        values = self.simulate_words(pack_patterns(test_vectors))
+        output_bits = unpack_patterns(values[self.output_index], len(test_vectors))
+        return {output: output_bits[i].tolist() for i, output in enumerate(self.outputs)}
+
+
+# Group the gates of every level by kind (kinds[opcode]) and fanin count so
+# that the fanin indices of a group form a rectangular (gates x fanins) array.
+# Returns, per level, a list of (kind, gate indices, fanin index matrix).
+def level_groups(netlist, kinds):
+    levels = {}
+    fanin = np.asarray(netlist.fanin).astype(np.intp)
+    fanin_start = netlist.fanin_start
+    for gate in range(netlist.num_inputs, len(netlist.names)):
+        start, end = fanin_start[gate], fanin_start[gate + 1]
+        group = levels.setdefault(netlist.levels[gate], {}).setdefault((kinds[netlist.opcodes[gate]], end - start), ([], []))
+        group[0].append(gate)
+        group[1].append(fanin[start:end])
+
+    return [
+        [(kind, np.array(out_idx, dtype=np.intp), np.array(fanin_idx, dtype=np.intp).reshape(len(out_idx), fanin_count))
+         for (kind, fanin_count), (out_idx, fanin_idx) in levels[level].items()]
+        for level in sorted(levels)
+    ]
+
+
+# Pack a list of 0/1 test vectors into a (num_inputs x num_words) uint64 array
+def pack_patterns(test_vectors):
+    bits = np.asarray(test_vectors, dtype=np.uint8).T  # (inputs x patterns)
+    num_words = (bits.shape[1] + 63) // 64
+    padded = np.zeros((bits.shape[0], num_words * 64), dtype=np.uint8)
+    padded[:, :bits.shape[1]] = bits
+    packed = np.packbits(padded, axis=1, bitorder='little')
+    return packed.view('<u8').astype(np.uint64)
+
+
+# Inverse of pack_patterns for the first num_patterns bit positions
+def unpack_patterns(words, num_patterns):
+    as_bytes = np.ascontiguousarray(words, dtype='<u8').view(np.uint8)
+    return np.unpackbits(as_bytes, axis=1, bitorder='little')[:, :num_patterns]
+
+
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+# Number of ones per row of a packed array, optionally only over the first
+# num_patterns bit positions (popcount via a byte lookup table)
+def count_ones(words, num_patterns=None):
+    words = np.array(words, dtype='<u8', order='C')
+    total_bits = words.shape[1] * 64
+    if num_patterns is not None and num_patterns < total_bits:
+        full_words, tail_bits = divmod(num_patterns, 64)
+        words[:, full_words + (1 if tail_bits else 0):] = 0
+        if tail_bits:
+            words[:, full_words] &= np.uint64((1 << tail_bits) - 1)
+    return _BYTE_POPCOUNT[words.view(np.uint8)].sum(axis=1, dtype=np.int64)
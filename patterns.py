@@ -0,0 +1,31 @@
+import numpy as np
+from numpy_sim import unpack_patterns
+
+# Reproducible, splittable random pattern streams. A stream is identified by
+# its seed; batch k is drawn from its own generator, seeded from
+# SeedSequence(seed, spawn_key=(k,)), so batches are statistically independent
+# and each one is the same whichever process or in whatever order it is
+# produced. Splitting a run over a process pool by batch index therefore gives
+# bit-identical results for a given seed, for any number of workers.
+
+
+class PatternStream:
+    def __init__(self, num_inputs, seed=None):
+        self.num_inputs = num_inputs
+        # With no seed, draw fresh entropy once and keep it so the run can be replayed
+        self.seed = np.random.SeedSequence().entropy if seed is None else seed
+
+    # Independent generator of batch index batch
+    def generator(self, batch):
+        return np.random.Generator(np.random.PCG64(np.random.SeedSequence(self.seed, spawn_key=(batch,))))
+
+    # Packed (num_inputs x num_words) uint64 patterns of a batch, 64 per word.
+    # Drawn word by word, so a shorter draw is a prefix of a longer one.
+    def words(self, batch, num_words):
+        words = self.generator(batch).integers(0, 2 ** 64, size=(num_words, self.num_inputs), dtype=np.uint64)
+        return np.ascontiguousarray(words.T)
+
+    # The same patterns as count 0/1 test vectors (lists, one value per input)
+    def vectors(self, batch, count):
+        bits = unpack_patterns(self.words(batch, (count + 63) // 64), count)
+        return bits.T.tolist()
@@ -0,0 +1,258 @@
+import heapq
+
+# Small conflict-driven clause-learning SAT solver in pure Python, sized for
+# the per-fault ATPG miters (thousands of variables, not millions). Literals
+# use the DIMACS convention on the outside (v is variable v true, -v false)
+# and 2 * v + sign inside, so a literal and its negation differ in bit 0.
+# Two watched literals per clause, first-UIP learning, VSIDS branching with
+# phase saving, and Luby restarts.
+
+RESTART_BASE = 100
+ACTIVITY_DECAY = 0.95
+
+
+# i-th element (from 1) of the Luby restart sequence 1, 1, 2, 1, 1, 2, 4, ...
+def luby(i):
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+class SatSolver:
+    def __init__(self):
+        self.num_vars = 0
+        self.clauses = []
+        self.watches = [[], []]  # per literal: clauses watching it
+        self.values = [0, 0]  # per literal: 1 true, -1 false, 0 unassigned
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [1]  # saved sign bit, negative first
+        self.heap = []
+        self.increment = 1.0
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.ok = True
+        self.conflicts = 0
+        self.model = None
+
+    def new_var(self):
+        self.num_vars += 1
+        self.watches += [[], []]
+        self.values += [0, 0]
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.phase.append(1)
+        heapq.heappush(self.heap, (0.0, self.num_vars))
+        return self.num_vars
+
+    # Add a clause (iterable of DIMACS literals). Returns False once the
+    # clauses are known to be unsatisfiable.
+    def add_clause(self, literals):
+        if not self.ok:
+            return False
+        values = self.values
+        clause = []
+        for literal in literals:
+            lit = 2 * literal if literal > 0 else -2 * literal + 1
+            if values[lit] == 1 or lit ^ 1 in clause:
+                return True  # Already satisfied, or a tautology
+            if values[lit] == 0 and lit not in clause:
+                clause.append(lit)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self._enqueue(clause[0], None)
+            self.ok = self._propagate() is None
+        else:
+            self._attach(clause)
+        return self.ok
+
+    # Returns True (model in self.model, indexed by variable), False when
+    # unsatisfiable, or None when conflict_limit conflicts pass first
+    def solve(self, conflict_limit=None):
+        self.model = None
+        if not self.ok:
+            return False
+        conflicts = 0
+        restart = 1
+        restart_conflicts = RESTART_BASE * luby(restart)
+
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+                learnt, backjump = self._analyze(conflict)
+                self._backtrack(backjump)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    self._enqueue(learnt[0], self._attach(learnt))
+                self.increment /= ACTIVITY_DECAY
+
+                if conflict_limit is not None and conflicts >= conflict_limit:
+                    self._backtrack(0)
+                    return None
+                restart_conflicts -= 1
+                if restart_conflicts == 0:
+                    self._backtrack(0)
+                    restart += 1
+                    restart_conflicts = RESTART_BASE * luby(restart)
+                continue
+
+            var = self._decide()
+            if var is None:
+                self.model = [None] + [self.values[2 * v] == 1 for v in range(1, self.num_vars + 1)]
+                self._backtrack(0)
+                return True
+            self.trail_lim.append(len(self.trail))
+            self._enqueue(2 * var + self.phase[var], None)
+
+    # Value of a DIMACS literal in the last model
+    def model_value(self, literal):
+        return self.model[literal] if literal > 0 else not self.model[-literal]
+
+    def _attach(self, clause):
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def _enqueue(self, lit, reason):
+        self.values[lit] = 1
+        self.values[lit ^ 1] = -1
+        var = lit >> 1
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    # Unit propagation over the watched literals; returns a conflicting
+    # clause index or None
+    def _propagate(self):
+        values, clauses, watches, trail = self.values, self.clauses, self.watches, self.trail
+        while self.qhead < len(trail):
+            false_lit = trail[self.qhead] ^ 1
+            self.qhead += 1
+            watch_list = watches[false_lit]
+            i = j = 0
+            count = len(watch_list)
+            while i < count:
+                index = watch_list[i]
+                i += 1
+                clause = clauses[index]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                if values[first] == 1:
+                    watch_list[j] = index
+                    j += 1
+                    continue
+
+                for k in range(2, len(clause)):
+                    if values[clause[k]] != -1:
+                        clause[1], clause[k] = clause[k], false_lit
+                        watches[clause[1]].append(index)
+                        break
+                else:
+                    watch_list[j] = index
+                    j += 1
+                    if values[first] == -1:
+                        while i < count:
+                            watch_list[j] = watch_list[i]
+                            j += 1
+                            i += 1
+                        del watch_list[j:]
+                        self.qhead = len(trail)
+                        return index
+                    self._enqueue(first, index)
+            del watch_list[j:]
+        return None
+
+    # First-UIP conflict analysis; returns the learnt clause (asserting
+    # literal first, a literal of the backjump level second) and that level
+    def _analyze(self, conflict):
+        level, reason, trail = self.level, self.reason, self.trail
+        current = len(self.trail_lim)
+        seen = set()
+        learnt = [None]
+        pending = 0
+        index = len(trail) - 1
+        clause = self.clauses[conflict]
+        start = 0
+
+        while True:
+            for lit in clause[start:]:
+                var = lit >> 1
+                if var not in seen and level[var] > 0:
+                    seen.add(var)
+                    self._bump(var)
+                    if level[var] == current:
+                        pending += 1
+                    else:
+                        learnt.append(lit)
+            while trail[index] >> 1 not in seen:
+                index -= 1
+            lit = trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[reason[lit >> 1]]
+            start = 1  # Skip the implied literal itself
+
+        learnt[0] = lit ^ 1
+        if len(learnt) == 1:
+            return learnt, 0
+        deepest = max(range(1, len(learnt)), key=lambda k: level[learnt[k] >> 1])
+        learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+        return learnt, level[learnt[1] >> 1]
+
+    def _backtrack(self, target):
+        if len(self.trail_lim) <= target:
+            return
+        values, reason, phase, activity, heap = self.values, self.reason, self.phase, self.activity, self.heap
+        start = self.trail_lim[target]
+        for lit in self.trail[start:]:
+            var = lit >> 1
+            values[lit] = values[lit ^ 1] = 0
+            reason[var] = None
+            phase[var] = lit & 1
+            heapq.heappush(heap, (-activity[var], var))
+        del self.trail[start:]
+        del self.trail_lim[target:]
+        self.qhead = len(self.trail)
+
+    def _bump(self, var):
+        activity = self.activity
+        activity[var] += self.increment
+        if activity[var] > 1e100:
+            for v in range(1, self.num_vars + 1):
+                activity[v] *= 1e-100
+            self.increment *= 1e-100
+            self.heap = [(-activity[v], v) for v in range(1, self.num_vars + 1) if self.values[2 * v] == 0]
+            heapq.heapify(self.heap)
+        elif self.values[2 * var] == 0:
+            heapq.heappush(self.heap, (-activity[var], var))
+
+    # Unassigned variable of highest activity (stale heap entries are skipped)
+    def _decide(self):
+        heap, values = self.heap, self.values
+        while heap:
+            _, var = heapq.heappop(heap)
+            if values[2 * var] == 0:
+                return var
+        return None
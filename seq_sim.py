@@ -0,0 +1,101 @@
+import random
+import time
+from netlist import CACHE_DIR, CompiledCircuit, load_circuit
+
+# Cycle-based simulation of the ISCAS-89 sequential benches. The netlist is cut
+# at every DFF: flip-flop outputs become pseudo-primary inputs of the
+# combinational core and flip-flop D inputs become pseudo-primary outputs (see
+# CompiledCircuit). The core is levelized once; each clock cycle is one sweep
+# of its schedule followed by copying the next-state values into the
+# flip-flops.
+
+
+class SequentialCircuit:
+    def __init__(self, inputs, outputs, gates, codegen=True):
+        # Every cycle is a full sweep of the core, so it is code-generated by default
+        self._setup(CompiledCircuit(inputs, outputs, gates, codegen=codegen))
+
+    # Wrap an already compiled core, e.g. one from load_circuit
+    @classmethod
+    def from_core(cls, core):
+        circuit = cls.__new__(cls)
+        circuit._setup(core)
+        return circuit
+
+    def _setup(self, core):
+        self.core = core
+        self.flip_flops = core.flip_flops
+        self.state_nodes = [q for q, _ in self.flip_flops]
+        self.next_state_nodes = [d for _, d in self.flip_flops]
+        self.inputs = core.inputs[:len(core.inputs) - len(self.flip_flops)]
+        self.outputs = core.outputs[:len(core.outputs) - len(self.flip_flops)]
+
+        # Core node IDs of the primary outputs and the next-state (D) nodes; a
+        # cycle indexes the core's value list with them instead of going by name
+        output_ids = list(core.netlist.output_ids)
+        self.output_ids = output_ids[:len(self.outputs)]
+        self.next_state_ids = output_ids[len(self.outputs):]
+
+    # All flip-flops cleared, the usual ISCAS-89 power-up assumption
+    def reset_state(self):
+        return [0] * len(self.state_nodes)
+
+    # One clock cycle: returns the primary output values and the next state
+    def step(self, input_vector, state):
+        node_values = self.core.netlist.simulate(list(input_vector) + list(state))
+        output_values = [node_values[i] for i in self.output_ids]
+        next_state = [node_values[i] for i in self.next_state_ids]
+        return output_values, next_state
+
+    # Apply a sequence of input vectors, one per clock cycle. Returns the output
+    # values of every cycle and the final state.
+    def simulate_sequence(self, input_sequence, initial_state=None):
+        state = self.reset_state() if initial_state is None else list(initial_state)
+        output_trace = []
+        for input_vector in input_sequence:
+            output_values, state = self.step(input_vector, state)
+            output_trace.append(output_values)
+        return output_trace, state
+
+    # Bit-parallel variant: bit k of every word belongs to an independent input
+    # sequence k, so many sequences are clocked together. input_sequence holds
+    # one list of input words per cycle; state is one word per flip-flop.
+    def simulate_sequence_packed(self, input_sequence, mask, initial_state=None):
+        state = [0] * len(self.state_nodes) if initial_state is None else list(initial_state)
+        netlist = self.core.netlist
+        output_trace = []
+        for input_words in input_sequence:
+            node_values = netlist.simulate_packed(list(input_words) + state, mask)
+            output_trace.append([node_values[i] for i in self.output_ids])
+            state = [node_values[i] for i in self.next_state_ids]
+        return output_trace, state
+
+
+# Load through the netlist cache (see load_circuit; cache_dir=None parses)
+def load_sequential_circuit(file_path, codegen=True, cache_dir=CACHE_DIR):
+    return SequentialCircuit.from_core(load_circuit(file_path, cache_dir, codegen))
+
+
+def main():
+    circuits = ['seq_benches/s27.bench', 'seq_benches/s1238.bench', 'seq_benches/s38417.bench']
+    cycles = 1000
+
+    for circuit_file in circuits:
+        start_time = time.time()
+        circuit = load_sequential_circuit(circuit_file)
+        load_time = time.time() - start_time
+
+        input_sequence = [[random.randint(0, 1) for _ in circuit.inputs] for _ in range(cycles)]
+        start_time = time.time()
+        output_trace, state = circuit.simulate_sequence(input_sequence)
+        sim_time = time.time() - start_time
+
+        print(f"{circuit_file}: {len(circuit.inputs)} inputs, {len(circuit.outputs)} outputs, "
+              f"{len(circuit.flip_flops)} flip-flops, {len(circuit.core.netlist.sweep)} gates")
+        print(f"  Load time: {load_time:.2f} seconds")
+        print(f"  {cycles} cycles in {sim_time:.2f} seconds ({cycles / sim_time:.0f} cycles/s)")
+        print(f"  Final outputs: {''.join(str(v) for v in output_trace[-1])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import contextlib
+import json
+import time
+from collections import Counter
+
+# Optional instrumentation of the simulation core: gate evaluations per gate
+# type, events processed by the event-driven engines, faults dropped per
+# fault-simulation batch and wall time per phase (parse, levelize, good_sim,
+# fault_propagation). Disabled by default: `active` is then None and every hook
+# is a None check (phases share one no-op context manager), so the cost is a
+# few nanoseconds per batch, fault or event. Only the calling process is
+# counted; shards run in pool workers are not.
+#
+#   stats = simstats.enable('run.jsonl')   # JSON-lines sink, optional
+#   ... run the simulators ...
+#   simstats.disable()                     # writes the summary record
+#   print(stats.summary())
+
+active = None
+
+_NO_PHASE = contextlib.nullcontext()
+
+
+class SimStats:
+    def __init__(self, sink=None):
+        self.gate_evals = Counter()
+        self.events = 0
+        self.batches = 0
+        self.faults_dropped = 0
+        self.phase_times = Counter()
+        self.sink = open(sink, 'a') if sink is not None else None
+        self._schedule_counts = {}  # id -> (schedule, per-type counts)
+
+    # One evaluation of every (gate, kind, fanins) entry of a schedule list
+    # (IndexedNetlist.sweep or a cone of it)
+    def count_schedule(self, schedule):
+        entry = self._schedule_counts.get(id(schedule))
+        if entry is None or entry[0] is not schedule:
+            entry = self._schedule_counts[id(schedule)] = (schedule, Counter(kind for _, kind, _ in schedule))
+        self.gate_evals.update(entry[1])
+
+    # One full good-machine sweep evaluates every gate once
+    def count_sweep(self, compiled):
+        self.count_schedule(compiled.netlist.sweep)
+
+    def record_batch(self, engine, patterns, dropped, remaining):
+        self.batches += 1
+        self.faults_dropped += dropped
+        self.emit({'record': 'batch', 'engine': engine, 'batch': self.batches, 'patterns': patterns,
+                   'faults_dropped': dropped, 'faults_remaining': remaining})
+
+    def emit(self, record):
+        if self.sink is not None:
+            self.sink.write(json.dumps(record) + '\n')
+
+    def summary(self):
+        return {
+            'gate_evals': dict(self.gate_evals),
+            'total_gate_evals': sum(self.gate_evals.values()),
+            'events': self.events,
+            'batches': self.batches,
+            'faults_dropped': self.faults_dropped,
+            'phase_times': dict(self.phase_times),
+        }
+
+    def close(self):
+        if self.sink is not None:
+            self.emit(dict(record='summary', **self.summary()))
+            self.sink.close()
+            self.sink = None
+
+
+class _Phase:
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.stats.phase_times[self.name] += time.perf_counter() - self.start
+
+
+# Context manager timing the enclosed block as phase name (no-op when disabled)
+def phase(name):
+    return _NO_PHASE if active is None else _Phase(active, name)
+
+
+def enable(sink=None):
+    global active
+    if active is not None:
+        active.close()
+    active = SimStats(sink)
+    return active
+
+
+def disable():
+    global active
+    stats, active = active, None
+    if stats is not None:
+        stats.close()
+    return stats
@@ -0,0 +1,404 @@
+import json
+import multiprocessing
+import sys
+import time
+import numpy as np
+from netlist import CompiledCircuit, load_circuit
+from numpy_sim import NumpySimulator, count_ones, level_groups, unpack_patterns
+from patterns import PatternStream
+
+# Testability measures on the compiled integer netlist. Values are numpy arrays
+# indexed by node ID (compiled.netlist.names order). The gates are visited
+# level by level, so every fanin is final before it is read whatever order the
+# .bench file lists them in, and each (gate type, fanin count) group of a level
+# is computed with one vectorized gather. Sequential circuits are cut at the
+# flip-flops: their outputs are pseudo-primary inputs and their D inputs
+# pseudo-primary outputs.
+
+
+# SCOAP combinational controllabilities. Primary (and pseudo-primary) inputs
+# have CC0 = CC1 = 1; every gate adds 1 except buffers, as in the original
+# Project 2 rules. XOR/XNOR fold their inputs pairwise: the cheapest way to
+# reach even or odd parity so far. Types without a rule behave as buffers.
+def scoap_controllability(compiled):
+    netlist = compiled.netlist
+    cc0 = np.ones(len(netlist.names), dtype=np.int64)
+    cc1 = np.ones(len(netlist.names), dtype=np.int64)
+
+    for groups in level_groups(netlist, netlist.kinds):
+        for gate_type, out_idx, fanin_idx in groups:
+            in0 = cc0[fanin_idx]  # (gates x fanins)
+            in1 = cc1[fanin_idx]
+            if gate_type == 'AND':
+                out0, out1 = in0.min(axis=1) + 1, in1.sum(axis=1) + 1
+            elif gate_type == 'OR':
+                out0, out1 = in0.sum(axis=1) + 1, in1.min(axis=1) + 1
+            elif gate_type == 'NAND':
+                out0, out1 = in1.sum(axis=1) + 1, in0.min(axis=1) + 1
+            elif gate_type == 'NOR':
+                out0, out1 = in1.min(axis=1) + 1, in0.sum(axis=1) + 1
+            elif gate_type == 'NOT':
+                out0, out1 = in1[:, 0] + 1, in0[:, 0] + 1
+            elif gate_type == 'XOR' or gate_type == 'XNOR':
+                even, odd = in0[:, 0], in1[:, 0]
+                for k in range(1, fanin_idx.shape[1]):
+                    even, odd = (np.minimum(even + in0[:, k], odd + in1[:, k]),
+                                 np.minimum(even + in1[:, k], odd + in0[:, k]))
+                if gate_type == 'XNOR':
+                    even, odd = odd, even
+                out0, out1 = even + 1, odd + 1
+            else:
+                out0, out1 = in0[:, 0], in1[:, 0]  # BUFFER and default behavior
+            cc0[out_idx] = out0
+            cc1[out_idx] = out1
+
+    return cc0, cc1
+
+
+# Observability of nodes with no path to a (pseudo-)primary output
+UNOBSERVABLE = 2 ** 62
+
+
+# SCOAP combinational observabilities in one reverse-levelized sweep. Primary
+# (and pseudo-primary) outputs have CO = 0. Observing a gate input through a
+# gate costs the gate's CO, plus setting every other input to its
+# non-controlling value (min(CC0, CC1) for XOR/XNOR), plus 1 (0 for buffers).
+# A fanout stem takes the minimum over its branches. Unobservable nodes keep
+# UNOBSERVABLE.
+def scoap_observability(compiled, cc0, cc1):
+    netlist = compiled.netlist
+    co = np.full(len(netlist.names), UNOBSERVABLE, dtype=np.int64)
+    co[np.asarray(netlist.output_ids, dtype=np.intp)] = 0
+
+    for groups in reversed(level_groups(netlist, netlist.kinds)):
+        for gate_type, out_idx, fanin_idx in groups:
+            if gate_type == 'AND' or gate_type == 'NAND':
+                side = cc1[fanin_idx]
+            elif gate_type == 'OR' or gate_type == 'NOR':
+                side = cc0[fanin_idx]
+            elif gate_type == 'XOR' or gate_type == 'XNOR':
+                side = np.minimum(cc0[fanin_idx], cc1[fanin_idx])
+            else:
+                side = np.zeros(fanin_idx.shape, dtype=np.int64)  # NOT, BUFFER and default behavior
+
+            gate_cost = 1 if gate_type in ('AND', 'NAND', 'OR', 'NOR', 'XOR', 'XNOR', 'NOT') else 0
+            pin_co = co[out_idx][:, None] + (side.sum(axis=1)[:, None] - side) + gate_cost
+            np.minimum.at(co, fanin_idx.ravel(), np.minimum(pin_co, UNOBSERVABLE).ravel())
+
+    return co
+
+
+# CC0, CC1 and CO of every node, by node ID
+def compute_scoap(compiled):
+    cc0, cc1 = scoap_controllability(compiled)
+    return cc0, cc1, scoap_observability(compiled, cc0, cc1)
+
+
+# Same layout as print_scoap_results in the Project 2 SCOAP script, with CO
+# ('-' for unobservable nodes)
+def print_scoap_results(compiled, cc0, cc1, co):
+    print(f"{'Node':<10} {'C0':<10} {'C1':<10} {'CO':<10}")
+    print("-" * 40)
+    for i, name in enumerate(compiled.netlist.names):
+        observability = co[i] if co[i] < UNOBSERVABLE else '-'
+        print(f"{name:<10} {cc0[i]:<10} {cc1[i]:<10} {observability:<10}")
+
+
+# The nodes hardest to observe (largest finite CO), as (name, CO) pairs
+def hardest_to_observe(compiled, co, count=10):
+    observable = np.flatnonzero(co < UNOBSERVABLE)
+    ranked = observable[np.argsort(co[observable], kind='stable')[::-1][:count]]
+    return [(compiled.netlist.names[i], int(co[i])) for i in ranked]
+
+
+# Product over each row of everything but column k, for every k (prefix and
+# suffix products, so zero entries need no special case)
+def _products_of_others(values):
+    prefix = np.ones_like(values)
+    suffix = np.ones_like(values)
+    prefix[:, 1:] = np.cumprod(values[:, :-1], axis=1)
+    suffix[:, :-1] = np.cumprod(values[:, :0:-1], axis=1)[:, ::-1]
+    return prefix * suffix
+
+
+# COP signal probabilities (probability that each node is 1 under uniform
+# random inputs) in one levelized pass. Exact when the fanins of every gate are
+# independent, i.e. away from reconvergent fanout (see reconvergent_nodes).
+def cop_probabilities(compiled):
+    netlist = compiled.netlist
+    p1 = np.full(len(netlist.names), 0.5)
+
+    for groups in level_groups(netlist, netlist.kinds):
+        for gate_type, out_idx, fanin_idx in groups:
+            p = p1[fanin_idx]  # (gates x fanins)
+            if gate_type == 'AND' or gate_type == 'NAND':
+                out = p.prod(axis=1)
+            elif gate_type == 'OR' or gate_type == 'NOR':
+                out = 1 - (1 - p).prod(axis=1)
+            elif gate_type == 'XOR' or gate_type == 'XNOR':
+                out = p[:, 0]
+                for k in range(1, fanin_idx.shape[1]):
+                    out = out * (1 - p[:, k]) + p[:, k] * (1 - out)
+            else:
+                out = p[:, 0]  # NOT, BUFFER and default behavior
+            if gate_type in ('NAND', 'NOR', 'XNOR', 'NOT'):
+                out = 1 - out
+            p1[out_idx] = out
+
+    return p1
+
+
+# COP observabilities (probability that a value change on the node reaches an
+# output) in one reverse-levelized pass: a gate pin is observed when the gate
+# is and every other input is non-controlling; a stem is observed when any of
+# its branches is, assuming independent branches.
+def cop_observability(compiled, p1):
+    netlist = compiled.netlist
+    unobserved = np.ones(len(netlist.names))  # Product of (1 - branch observability)
+    unobserved[np.asarray(netlist.output_ids, dtype=np.intp)] = 0
+
+    for groups in reversed(level_groups(netlist, netlist.kinds)):
+        for gate_type, out_idx, fanin_idx in groups:
+            if gate_type == 'AND' or gate_type == 'NAND':
+                side = p1[fanin_idx]
+            elif gate_type == 'OR' or gate_type == 'NOR':
+                side = 1 - p1[fanin_idx]
+            else:
+                side = np.ones(fanin_idx.shape)  # XOR, NOT, BUFFER: always sensitized
+            pin_observability = (1 - unobserved[out_idx])[:, None] * _products_of_others(side)
+            np.multiply.at(unobserved, fanin_idx.ravel(), (1 - pin_observability).ravel())
+
+    return 1 - unobserved
+
+
+# Boolean array marking the nodes whose COP probability is not exact: gates
+# whose fanins share a fanout stem in their transitive fanin (reconvergent
+# fanout), and everything fed by such a gate. Supports are bitsets over the
+# stems, built in one pass in ID (topological) order.
+def reconvergent_nodes(compiled):
+    netlist = compiled.netlist
+    fanin, fanin_start, fanout_start = netlist.fanin, netlist.fanin_start, netlist.fanout_start
+    inexact = np.zeros(len(netlist.names), dtype=bool)
+    support = [0] * len(netlist.names)
+    stem_count = 0
+
+    for node in range(len(netlist.names)):
+        bits = 0
+        for k in range(fanin_start[node], fanin_start[node + 1]):
+            inp = fanin[k]
+            if inexact[inp] or bits & support[inp]:
+                inexact[node] = True
+                break
+            bits |= support[inp]
+        if inexact[node]:
+            continue  # Descendants are inexact anyway; no support needed
+        if fanout_start[node + 1] - fanout_start[node] > 1:
+            bits |= 1 << stem_count
+            stem_count += 1
+        support[node] = bits
+
+    return inexact
+
+
+# COP signal probabilities, optionally corrected for reconvergent fanout: with
+# samples > 0 the inexact nodes are re-estimated by bit-parallel random
+# simulation of their transitive fanin only, the rest stay analytic.
+def signal_probabilities(compiled, samples=0, seed=None):
+    p1 = cop_probabilities(compiled)
+    if samples <= 0:
+        return p1
+
+    inexact = np.flatnonzero(reconvergent_nodes(compiled))
+    if len(inexact) == 0:
+        return p1
+
+    netlist = compiled.netlist
+    fanin = np.asarray(netlist.fanin, dtype=np.intp)
+    in_cone = np.zeros(len(netlist.names), dtype=bool)
+    in_cone[inexact] = True
+    for node in range(len(netlist.names) - 1, netlist.num_inputs - 1, -1):
+        if in_cone[node]:
+            in_cone[fanin[netlist.fanin_start[node]:netlist.fanin_start[node + 1]]] = True
+
+    cone_ids = np.flatnonzero(in_cone)
+    cone = CompiledCircuit([netlist.names[i] for i in cone_ids if i < netlist.num_inputs], [],
+                           {netlist.names[i]: compiled.gates[netlist.names[i]] for i in cone_ids if i >= netlist.num_inputs})
+    ones = monte_carlo_counts(cone, samples, seed=seed)
+    for i in inexact:
+        p1[i] = ones[cone.netlist.ids[netlist.names[i]]] / samples
+    return p1
+
+
+# Half-width of the Wilson score interval for ones / patterns at the given
+# z (1.96 for 95%); unlike the plain normal interval it does not collapse to
+# zero for estimates of exactly 0 or 1
+def confidence_half_width(ones, patterns, z=1.96):
+    p = ones / patterns
+    return z / (1 + z * z / patterns) * np.sqrt(p * (1 - p) / patterns + z * z / (4 * patterns * patterns))
+
+
+_worker_state = {}
+
+
+def _init_monte_carlo_worker(compiled, stream):
+    _worker_state['simulator'] = NumpySimulator(compiled)
+    _worker_state['stream'] = stream
+
+
+def _simulate_batch(simulator, stream, batch, count, keep_values):
+    values = simulator.simulate_words(stream.words(batch, (count + 63) // 64))
+    return count, count_ones(values, count), values if keep_values else None
+
+
+def _simulate_worker_batch(args):
+    return _simulate_batch(_worker_state['simulator'], _worker_state['stream'], *args)
+
+
+# Random pattern batches of batch_words * 64 patterns (up to max_patterns)
+# simulated bit-parallel; yields (patterns, ones per node, packed values or
+# None) in batch order. Batch k always uses stream batch k, so with workers > 1
+# the batches run on a process pool and still give the same results.
+def _monte_carlo_batches(compiled, stream, max_patterns, batch_words, keep_values=False, workers=1):
+    batch_size = batch_words * 64
+    jobs = ((batch, min(batch_size, max_patterns - batch * batch_size), keep_values)
+            for batch in range((max_patterns + batch_size - 1) // batch_size))
+    if workers <= 1:
+        simulator = NumpySimulator(compiled)
+        for job in jobs:
+            yield _simulate_batch(simulator, stream, *job)
+        return
+
+    with multiprocessing.Pool(workers, initializer=_init_monte_carlo_worker, initargs=(compiled, stream)) as pool:
+        yield from pool.imap(_simulate_worker_batch, jobs)
+
+
+# Monte Carlo signal probabilities by bit-parallel random simulation: random
+# words (64 patterns each, batch_words per batch) go through NumpySimulator
+# and the ones are counted with a popcount. Stops once every node's estimate
+# is within +/- tolerance at the given z, or after max_patterns. The patterns
+# come from a PatternStream, so a given seed reproduces the run exactly, also
+# with workers > 1. Returns the probabilities and the number of patterns used.
+def monte_carlo_probabilities(compiled, tolerance=0.01, z=1.96, max_patterns=1 << 20, batch_words=16, seed=None,
+                              workers=1):
+    stream = PatternStream(len(compiled.inputs), seed)
+    ones = np.zeros(len(compiled.netlist.names), dtype=np.int64)
+    patterns = 0
+
+    batches = _monte_carlo_batches(compiled, stream, max_patterns, batch_words, workers=workers)
+    for count, batch_ones, _ in batches:
+        ones += batch_ones
+        patterns += count
+        if confidence_half_width(ones, patterns, z).max() <= tolerance:
+            break
+    batches.close()
+
+    return ones / patterns, patterns
+
+
+# Per-pattern record stream for Monte Carlo runs. 'binary' writes a one-line
+# header (RECORD_MAGIC, then JSON with the node names and record size) followed
+# by one record per pattern, the node values packed 8 per byte in node order.
+# 'csv' writes the node names as a header row and one row of 0/1 per pattern.
+RECORD_MAGIC = b'PATREC1\n'
+
+
+class PatternRecordWriter:
+    def __init__(self, path, names, record_format='binary'):
+        if record_format not in ('binary', 'csv'):
+            raise ValueError(f"Unknown record format: {record_format}")
+        self.record_format = record_format
+        self.file = open(path, 'wb')
+        if record_format == 'binary':
+            header = {'names': list(names), 'record_bytes': (len(names) + 7) // 8}
+            self.file.write(RECORD_MAGIC + json.dumps(header).encode('utf-8') + b'\n')
+        else:
+            self.file.write((','.join(names) + '\n').encode('utf-8'))
+
+    # values is a packed (nodes x words) array; writes its first num_patterns patterns
+    def write(self, values, num_patterns):
+        bits = unpack_patterns(values, num_patterns).T  # (patterns x nodes)
+        if self.record_format == 'binary':
+            self.file.write(np.packbits(bits, axis=1, bitorder='little').tobytes())
+        else:
+            rows = np.full((num_patterns, 2 * bits.shape[1]), ord(','), dtype=np.uint8)
+            rows[:, 0::2] = bits + ord('0')
+            rows[:, -1] = ord('\n')
+            self.file.write(rows.tobytes())
+
+    def close(self):
+        self.file.close()
+
+
+# Read a binary record stream back: the node names and a (patterns x nodes)
+# 0/1 array (memory-mapped, so large streams are not loaded at once)
+def read_pattern_records(path):
+    with open(path, 'rb') as file:
+        if file.read(len(RECORD_MAGIC)) != RECORD_MAGIC:
+            raise ValueError(f"{path} is not a pattern record file")
+        header = json.loads(file.readline().decode('utf-8'))
+        offset = file.tell()
+    names = header['names']
+    records = np.memmap(path, dtype=np.uint8, mode='r', offset=offset).reshape(-1, header['record_bytes'])
+    return names, np.unpackbits(records, axis=1, count=len(names), bitorder='little')
+
+
+# Streaming Monte Carlo: num_patterns random patterns are simulated in batches
+# and only a running count of ones per node is kept, so memory does not grow
+# with num_patterns. With record_path every pattern is also streamed to disk
+# (see PatternRecordWriter). Seeded and splittable over workers like
+# monte_carlo_probabilities. Returns the ones count of every node by node ID.
+def monte_carlo_counts(compiled, num_patterns, record_path=None, record_format='binary', batch_words=16, seed=None,
+                       workers=1):
+    stream = PatternStream(len(compiled.inputs), seed)
+    ones = np.zeros(len(compiled.netlist.names), dtype=np.int64)
+    writer = PatternRecordWriter(record_path, compiled.netlist.names, record_format) if record_path else None
+
+    try:
+        for count, batch_ones, values in _monte_carlo_batches(compiled, stream, num_patterns, batch_words,
+                                                              writer is not None, workers):
+            ones += batch_ones
+            if writer is not None:
+                writer.write(values, count)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return ones
+
+
+def main():
+    circuits = sys.argv[1:] or ['hw1.bench', 'c7552.bench', 'seq_benches/s38584.1.bench']
+
+    for circuit_file in circuits:
+        start_time = time.time()
+        compiled = load_circuit(circuit_file)
+        load_time = time.time() - start_time
+
+        start_time = time.time()
+        cc0, cc1, co = compute_scoap(compiled)
+        scoap_time = time.time() - start_time
+
+        print(f"{circuit_file}: {len(compiled.netlist.names)} nodes, depth {compiled.depth}")
+        print(f"  Load time: {load_time:.2f} seconds, SCOAP: {scoap_time:.3f} seconds")
+        print(f"  Max CC0 = {cc0.max()}, max CC1 = {cc1.max()}, "
+              f"unobservable nodes: {int((co >= UNOBSERVABLE).sum())}")
+        print("  Hardest to observe: " + ', '.join(f"{name} ({value})" for name, value in hardest_to_observe(compiled, co, 5)))
+
+        start_time = time.time()
+        p1 = cop_probabilities(compiled)
+        observability = cop_observability(compiled, p1)
+        cop_time = time.time() - start_time
+        inexact = reconvergent_nodes(compiled)
+        print(f"  COP: {cop_time:.3f} seconds, {int(inexact.sum())} nodes below reconvergent fanout")
+        print(f"  COP observability: mean {observability.mean():.3f}, "
+              f"{int((observability < 0.001).sum())} nodes below 0.001")
+
+        start_time = time.time()
+        mc_p1, patterns = monte_carlo_probabilities(compiled)
+        mc_time = time.time() - start_time
+        print(f"  Monte Carlo: {patterns} patterns for +/-0.01 at 95% in {mc_time:.2f} seconds, "
+              f"max |COP - MC| = {np.abs(p1 - mc_p1).max():.3f}")
+
+
+if __name__ == "__main__":
+    main()